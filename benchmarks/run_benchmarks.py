@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.server import FixtureServer, read_fixture
+from scrapper import extraction, file_handling
+from scrapper.throttle import RATE_CONTROLLER
+from scrapper.writers import WRITERS
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Paths of the fixture pages on the local server
+LOI_PATH = "/loi/pps"
+ISSUE_PATH = "/toc/pps/15/3"
+ARTICLE_PATH = "/doi/full/10.1177/1745691620000001"
+
+
+def measure(function, repeat):
+    """
+    Times several calls of a function.
+
+    :param function: The function to call, without arguments.
+    :param repeat: The number of calls.
+    :return: The median duration of a call, in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+
+    return statistics.median(durations)
+
+
+def sample_records(count):
+    """Returns records shaped like the output of Journal.get_details, all with a different DOI."""
+    record = extraction.parse_details(read_fixture("article.html").decode(), "http://localhost" + ARTICLE_PATH)
+    for author in record["Authors"]:
+        author.update({"Gender": "female", "Gender probability": 0.98})
+
+    return [dict(record, **{"Paper DOI": f"https://doi.org/10.1177/{n}"}) for n in range(count)]
+
+
+def benchmark_extraction(server, repeat):
+    """Times the parsing of saved pages, without a browser."""
+    article_html = read_fixture("article.html").decode().replace("{{DOI}}", "1745691620000001")
+    issue_html = read_fixture("issue.html").decode()
+    loi_html = read_fixture("loi.html").decode()
+
+    return {
+        "extraction.parse_details": measure(
+            lambda: extraction.parse_details(article_html, server.url(ARTICLE_PATH)), repeat),
+        "extraction.parse_articles": measure(
+            lambda: extraction.parse_articles(issue_html, server.url(ISSUE_PATH)), repeat),
+        "extraction.parse_issue_index": measure(
+            lambda: extraction.parse_issue_index(loi_html, server.url(LOI_PATH)), repeat),
+    }
+
+
+def benchmark_output(records, repeat):
+    """Times writing records with every result store backend, and with Journal.populate_df."""
+    import pandas as pd
+    import scrapper.constants as const
+    from scrapper.scrapper import Journal
+
+    def populate():
+        df = pd.DataFrame(columns=const.COLUMNS)
+        for record in records:
+            # populate_df does not use the browser, so it is called without starting one
+            df = Journal.populate_df(None, df, record)
+
+    def write(backend):
+        with tempfile.TemporaryDirectory() as directory:
+            writer = WRITERS[backend](os.path.join(directory, f"results.{backend}"))
+            for record in records:
+                writer.write(record)
+            writer.close()
+
+    results = {f"Journal.populate_df x{len(records)}": measure(populate, repeat)}
+    for backend in WRITERS:
+        try:
+            results[f"writers.{backend} x{len(records)}"] = measure(lambda: write(backend), repeat)
+        except ImportError as e:
+            print(f"Skipping the {backend} backend: {e}")
+
+    return results
+
+
+def benchmark_download(server, repeat):
+    """Times downloading the figures of an article from the local server."""
+    session = file_handling.create_session([], "benchmark")
+    image_links = [server.url(f"/cms/10.1177/1745691620000001/asset/images/large/fig{n}.jpeg") for n in range(1, 6)]
+
+    def download():
+        with tempfile.TemporaryDirectory() as directory:
+            failures = file_handling.download_files(image_links, directory, session)
+            if failures:
+                raise RuntimeError(f"Failed to download {list(failures)}")
+
+    try:
+        return {"file_handling.download_files x5": measure(download, repeat)}
+    finally:
+        session.close()
+
+
+def benchmark_browser(server, repeat):
+    """Times the Journal methods against the local server with a headless browser."""
+    from scrapper.scrapper import Journal
+
+    results = {}
+    bot = Journal(headless=True)
+
+    try:
+        bot.open_link(server.url(LOI_PATH), "listing")
+        results["Journal.get_issues"] = measure(lambda: bot.get_issues("2020"), repeat)
+
+        # Compare the snapshot extraction with the element by element extraction
+        for snapshot in (True, False):
+            bot.snapshot = snapshot
+            mode = "snapshot" if snapshot else "webdriver"
+
+            bot.open_link(server.url(ISSUE_PATH), "listing")
+            results[f"Journal.get_articles ({mode})"] = measure(bot.get_articles, repeat)
+
+            bot.open_link(server.url(ARTICLE_PATH), "article")
+            results[f"Journal.get_details ({mode})"] = measure(
+                lambda: bot.get_details(enrich_gender=False), repeat)
+
+        # Compare loading an article with and without blocking its images, fonts and stylesheets
+        for block_resources in (True, False):
+            bot.block_resources = block_resources
+            bot.set_resource_policy("article" if block_resources else None)
+            mode = "blocking" if block_resources else "full page"
+            results[f"Journal.open_link article ({mode})"] = measure(
+                lambda: bot.open_link(server.url(ARTICLE_PATH), "article"), repeat)
+
+        # Latency of a whole article: opening it, extracting it and downloading its figures
+        bot.block_resources = True
+        bot.snapshot = True
+        session = bot.get_session()
+
+        def article():
+            bot.open_link(server.url(ARTICLE_PATH), "article")
+            details = bot.get_details(enrich_gender=False)
+            image_links = [image["Link"] for image in details["Images"]]
+            with tempfile.TemporaryDirectory() as directory:
+                file_handling.download_files(image_links, directory, session)
+
+        results["article end-to-end"] = measure(article, repeat)
+        session.close()
+    finally:
+        bot.quit()
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Prints the results next to the baseline.
+
+    :return: The names of the benchmarks slower than the baseline by more than the tolerance.
+    """
+    regressions = []
+
+    print(f"{'benchmark':45} {'median':>12} {'baseline':>12} {'change':>8}")
+    for name, duration in results.items():
+        reference = baseline.get(name)
+        if reference:
+            change = duration / reference - 1
+            flag = " REGRESSION" if change > tolerance else ""
+            print(f"{name:45} {duration * 1000:10.2f}ms {reference * 1000:10.2f}ms {change:+8.0%}{flag}")
+            if flag:
+                regressions.append(name)
+        else:
+            print(f"{name:45} {duration * 1000:10.2f}ms {'-':>12} {'-':>8}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraper's hot paths against saved pages, offline.")
+    parser.add_argument("--repeat", type=int, default=20, help="number of timed calls of each benchmark")
+    parser.add_argument("--records", type=int, default=500, help="number of records written by the output benchmarks")
+    parser.add_argument("--no-browser", action="store_true", help="skip the benchmarks that need Chrome")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="slowdown over the baseline reported as a regression, 0.25 is 25%%")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="path of the baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args()
+
+    # Time the code, not the pace of the requests, the local server does not need to be spared
+    RATE_CONTROLLER.enabled = False
+
+    results = {}
+    with FixtureServer() as server:
+        results.update(benchmark_extraction(server, args.repeat))
+        results.update(benchmark_output(sample_records(args.records), max(1, args.repeat // 10)))
+        results.update(benchmark_download(server, args.repeat))
+        if not args.no_browser:
+            results.update(benchmark_browser(server, args.repeat))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=4)
+        print(f"Baseline saved to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
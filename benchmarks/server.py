@@ -0,0 +1,70 @@
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def read_fixture(name):
+    """Returns the content of a fixture file as bytes."""
+    with open(os.path.join(FIXTURES_PATH, name), "rb") as f:
+        return f.read()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves the saved pages with the URL layout of the journal's site."""
+
+    # Routes from a URL pattern to the fixture served and its content type
+    routes = [
+        (re.compile(r"^/loi/"), "loi.html", "text/html; charset=utf-8"),
+        (re.compile(r"^/toc/"), "issue.html", "text/html; charset=utf-8"),
+        (re.compile(r"^/doi/(full/)?10\.1177/(?P<doi>[^/?#]+)"), "article.html", "text/html; charset=utf-8"),
+        (re.compile(r"\.jpe?g$"), "figure.jpeg", "image/jpeg"),
+    ]
+
+    def do_GET(self):
+        for pattern, fixture, content_type in self.routes:
+            match = pattern.search(self.path)
+            if match:
+                body = read_fixture(fixture)
+
+                # Every article is rendered from the same template with its own DOI
+                if "doi" in match.groupdict():
+                    body = body.replace(b"{{DOI}}", match.group("doi").encode())
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+        self.send_error(404)
+
+    def log_message(self, format, *args):
+        # Keep the benchmark output readable
+        pass
+
+
+class FixtureServer:
+    """Local HTTP server serving the fixtures on a free port, for as long as the context is open."""
+
+    def __init__(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path):
+        """Returns the absolute URL of a path on the server."""
+        host, port = self.server.server_address
+
+        return f"http://{host}:{port}{path}"
+
+    def __enter__(self):
+        self.thread.start()
+
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,3 @@
+from scrapper.cli import main
+
+main()
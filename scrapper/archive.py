@@ -0,0 +1,131 @@
+import hashlib
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import scrapper.constants as const
+from scrapper import extraction
+from scrapper.database import connect
+
+
+class PageArchive:
+    """
+    Compressed HTML of every issue and article page the browsers fetched, keyed by URL and fetch time, so the
+    extraction can be run again over them without a browser or the network.
+
+    A page fetched again with the same content is not stored twice.
+    """
+
+    def __init__(self, path=const.ARCHIVE_PATH):
+        """
+        :param path: The path of the SQLite database holding the archive.
+        """
+        self.path = path
+        # The archive is shared by the browser threads
+        self.lock = threading.Lock()
+        self.connection = connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS pages ("
+                                "url TEXT, fetched_at REAL, kind TEXT, sha1 TEXT, html BLOB, "
+                                "PRIMARY KEY (url, fetched_at))")
+        self.connection.commit()
+
+    def put(self, url, kind, html):
+        """
+        Archives a page.
+
+        :param url: The URL of the page.
+        :param kind: The kind of page, "index", "issue" or "article".
+        :param html: The HTML of the page.
+        """
+        content = html.encode("utf-8")
+        sha1 = hashlib.sha1(content).hexdigest()
+        compressed = zlib.compress(content, const.ARCHIVE_COMPRESSION)
+
+        with self.lock:
+            latest = self.connection.execute("SELECT sha1 FROM pages WHERE url = ? ORDER BY fetched_at DESC LIMIT 1",
+                                             (url,)).fetchone()
+            if latest is not None and latest[0] == sha1:
+                return
+
+            self.connection.execute("INSERT INTO pages (url, fetched_at, kind, sha1, html) VALUES (?, ?, ?, ?, ?)",
+                                    (url, time.time(), kind, sha1, compressed))
+            self.connection.commit()
+
+    def latest(self, kind, batch_size=const.REPLAY_BATCH_SIZE):
+        """
+        Iterates over the latest version of every page of a kind, still compressed.
+
+        :param kind: The kind of page.
+        :param batch_size: The number of pages read from the database at a time.
+        :return: Iterator of lists of (URL, compressed HTML) tuples.
+        """
+        # Read through a connection of our own so the crawl is not blocked while iterating
+        connection = connect(self.path)
+        try:
+            cursor = connection.execute(
+                "SELECT url, html FROM pages AS page WHERE kind = ? AND fetched_at = "
+                "(SELECT MAX(fetched_at) FROM pages WHERE url = page.url) ORDER BY fetched_at", (kind,))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            connection.close()
+
+    def close(self):
+        self.connection.close()
+
+
+def extract(url, compressed_html):
+    """
+    Extracts the details of an archived article page, in a worker process.
+
+    :param url: The URL of the page.
+    :param compressed_html: The compressed HTML of the page.
+    :return: Tuple of the details, or None, and the error that made the extraction fail, or None.
+    """
+    try:
+        return extraction.parse_details(zlib.decompress(compressed_html).decode("utf-8"), url), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def replay(archive, writer, genders=None, workers=None):
+    """
+    Runs the extraction over the archived article pages again, on every CPU core, without a browser or the network.
+
+    :param archive: The PageArchive to read the pages from.
+    :param writer: The ResultWriter the details of the articles are written to.
+    :param genders: The GenderEnricher filling in the gender of the authors from its cache only, expired results
+        included so a replay does not erase the genders of the store, if any.
+    :param workers: The number of worker processes, the number of CPU cores if not given.
+    :return: Tuple of the number of articles extracted and the number of pages that failed.
+    """
+    extracted = failed = 0
+    workers = workers or os.cpu_count()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Pages are sent a batch at a time so only a batch of them is held in memory
+        for rows in archive.latest("article"):
+            urls = [url for url, _ in rows]
+            results = list(executor.map(extract, urls, [html for _, html in rows],
+                                        chunksize=max(1, len(rows) // (4 * workers))))
+
+            records = []
+            for url, (details, error) in zip(urls, results):
+                if details is None:
+                    print(f"Failed to extract {url}: {error}")
+                    failed += 1
+                else:
+                    records.append(details)
+
+            if genders is not None:
+                genders.enrich(records, fetch=False)
+
+            writer.write_many(records)
+            extracted += len(records)
+
+    return extracted, failed
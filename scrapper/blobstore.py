@@ -0,0 +1,80 @@
+import hashlib
+import os
+import shutil
+
+import scrapper.constants as const
+
+
+class BlobStore:
+    """
+    Files stored once under the SHA-256 hash of their content, the same figure downloaded for several articles
+    taking the space of one. The per-year and per-title folders are views made of hardlinks to the blobs.
+    """
+
+    def __init__(self, path=const.BLOB_PATH):
+        """
+        :param path: The directory holding the blobs.
+        """
+        self.path = path
+        os.makedirs(os.path.join(path, "tmp"), exist_ok=True)
+
+    def blob_path(self, sha256, extension=""):
+        """
+        Returns the path of the blob of a content, two levels of folders deep to keep directories small.
+
+        :param sha256: The SHA-256 hash of the content.
+        :param extension: The extension of the file, kept so the blobs can be opened directly.
+        """
+        return os.path.join(self.path, sha256[:2], sha256[2:4], sha256 + extension)
+
+    def temp_path(self, url):
+        """
+        Returns the path a file is downloaded to before being stored, the same for every attempt so a partial
+        download can be resumed.
+
+        :param url: The URL of the file.
+        """
+        return os.path.join(self.path, "tmp", hashlib.sha1(url.encode()).hexdigest() + ".part")
+
+    def store(self, temp_path, sha256, extension=""):
+        """
+        Moves a downloaded file into the store, atomically.
+
+        :param temp_path: The path of the downloaded file.
+        :param sha256: The SHA-256 hash of its content.
+        :param extension: The extension of the file.
+        :return: The path of the blob.
+        """
+        blob = self.blob_path(sha256, extension)
+
+        if os.path.exists(blob):
+            # The content is already stored
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.replace(temp_path, blob)
+
+        return blob
+
+    def link(self, blob, destination):
+        """
+        Makes a file of a view point to a blob, atomically.
+
+        Falls back to a copy where hardlinks are not possible, e.g. across file systems.
+
+        :param blob: The path of the blob.
+        :param destination: The path of the file in the view.
+        """
+        if os.path.exists(destination) and os.path.samefile(blob, destination):
+            return
+
+        temp_path = destination + ".tmp"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+        try:
+            os.link(blob, temp_path)
+        except OSError:
+            shutil.copyfile(blob, temp_path)
+
+        os.replace(temp_path, destination)
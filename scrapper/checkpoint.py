@@ -0,0 +1,149 @@
+import hashlib
+import re
+import threading
+import time
+
+import scrapper.constants as const
+from scrapper.database import connect
+
+# Matches a DOI inside a URL, e.g. https://journals.sagepub.com/doi/full/10.1177/1745691615598525
+DOI_PATTERN = re.compile(r"10\.\d{4,9}/[^?#\s]+")
+
+
+def normalize_doi(value):
+    """
+    Extracts the bare DOI from a DOI link or an article URL.
+
+    :param value: A DOI, a doi.org link or the URL of an article.
+    :return: The lower-cased DOI, e.g. "10.1177/1745691615598525", or None if there is none.
+    """
+    match = DOI_PATTERN.search(value or "")
+
+    return match.group(0).rstrip("/").lower() if match else None
+
+
+def fingerprint(article_urls):
+    """
+    Fingerprints the articles listed by an issue, to tell whether the issue changed since it was scraped.
+
+    :param article_urls: The URLs of the articles of the issue, None if it has none.
+    :return: The hexadecimal SHA-1 of the DOIs of the articles, whatever their order.
+    """
+    keys = sorted(normalize_doi(url) or url for url in article_urls or [])
+
+    return hashlib.sha1("\n".join(keys).encode()).hexdigest()
+
+
+class Checkpoint:
+    """
+    Durable record of the issues and articles already scraped, so an interrupted crawl can resume.
+
+    Articles are keyed by their DOI and issues by their URL. The details of the articles themselves
+    are kept by the result store, see scrapper.writers.
+    """
+
+    def __init__(self, path=const.CHECKPOINT_PATH):
+        """
+        :param path: The path of the SQLite database holding the checkpoint.
+        """
+        self.lock = threading.Lock()
+        self.connection = connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS issues (
+                url TEXT PRIMARY KEY, year TEXT, finished_at REAL, fingerprint TEXT);
+            CREATE TABLE IF NOT EXISTS articles (
+                doi TEXT PRIMARY KEY, url TEXT, issue_url TEXT, status TEXT, error TEXT, updated_at REAL);
+            CREATE INDEX IF NOT EXISTS articles_url ON articles (url);
+        """)
+
+        # Checkpoints of runs before the fingerprints were recorded
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(issues)")]
+        if "fingerprint" not in columns:
+            self.connection.execute("ALTER TABLE issues ADD COLUMN fingerprint TEXT")
+
+        self.connection.commit()
+
+    def is_issue_done(self, url):
+        """Returns whether all the articles of the issue have been scraped."""
+        with self.lock:
+            row = self.connection.execute("SELECT 1 FROM issues WHERE url = ?", (url,)).fetchone()
+
+        return row is not None
+
+    def issue_fingerprint(self, url):
+        """
+        Returns the fingerprint of the articles the issue listed when it was finished.
+
+        :return: The fingerprint, as returned by fingerprint, or None if the issue is not done or was finished by a
+            run that did not record it.
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT fingerprint FROM issues WHERE url = ?", (url,)).fetchone()
+
+        return row[0] if row is not None else None
+
+    def mark_issue_done(self, url, year, fingerprint=None):
+        """
+        Records that all the articles of the issue have been scraped.
+
+        :param url: The URL of the issue.
+        :param year: The year of the issue.
+        :param fingerprint: The fingerprint of the articles listed by the issue, if known.
+        """
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO issues (url, year, finished_at, fingerprint) VALUES (?, ?, ?, ?)",
+                (url, year, time.time(), fingerprint))
+            self.connection.commit()
+
+    def reopen_issue(self, url):
+        """Records that the issue has articles left to scrape, e.g. new articles published in it since it was done."""
+        with self.lock:
+            self.connection.execute("DELETE FROM issues WHERE url = ?", (url,))
+            self.connection.commit()
+
+    def is_article_done(self, url):
+        """Returns whether the article behind the URL has been scraped successfully."""
+        # Articles are looked up by their DOI on the primary key, by their URL only when it has no DOI
+        doi = normalize_doi(url)
+        column, key = ("doi", doi) if doi else ("url", url)
+        with self.lock:
+            row = self.connection.execute(f"SELECT 1 FROM articles WHERE {column} = ? AND status = 'done'",
+                                          (key,)).fetchone()
+
+        return row is not None
+
+    def mark_article_done(self, url, issue_url, record):
+        """
+        Records a successfully scraped article.
+
+        :param url: The URL of the article.
+        :param issue_url: The URL of the issue listing the article.
+        :param record: The dictionary returned by Journal.get_details.
+        """
+        doi = normalize_doi(record.get("Paper DOI")) or normalize_doi(url) or url
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO articles (doi, url, issue_url, status, error, updated_at) "
+                "VALUES (?, ?, ?, 'done', NULL, ?)",
+                (doi, url, issue_url, time.time()))
+            self.connection.commit()
+
+    def mark_article_failed(self, url, issue_url, error):
+        """
+        Records an article that could not be scraped, so it is retried on the next run.
+
+        :param url: The URL of the article.
+        :param issue_url: The URL of the issue listing the article.
+        :param error: The exception raised while scraping the article.
+        """
+        doi = normalize_doi(url) or url
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO articles (doi, url, issue_url, status, error, updated_at) "
+                "VALUES (?, ?, ?, 'failed', ?, ?)",
+                (doi, url, issue_url, repr(error), time.time()))
+            self.connection.commit()
+
+    def close(self):
+        self.connection.close()
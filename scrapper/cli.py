@@ -0,0 +1,478 @@
+import argparse
+import hashlib
+import os
+import re
+import sys
+from urllib.parse import urlparse
+
+import scrapper.constants as const
+from scrapper import schema
+from scrapper.search import FIELDS, TEXT_FIELDS, IndexingWriter, SearchIndex
+from scrapper.writers import WRITERS, detect_backend, export_excel, open_writer
+
+
+def parse_shard(value):
+    """
+    Parses a shard given as "i/N", the i-th of N shards counting from 1.
+
+    :return: Tuple of the index of the shard, from 0, and the number of shards.
+    """
+    match = re.fullmatch(r"(\d+)/(\d+)", value)
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"invalid shard {value!r}, expected i/N with 1 <= i <= N, e.g. 1/4")
+
+    return int(match.group(1)) - 1, int(match.group(2))
+
+
+def in_shard(issue_url, index, count):
+    """
+    Tells whether an issue belongs to a shard.
+
+    Issues are assigned by a hash of the path of their URL, so every process and every host assigns an issue to
+    the same shard whatever the order or the range of the issues it crawls.
+
+    :param issue_url: The URL of the issue.
+    :param index: The index of the shard, from 0.
+    :param count: The number of shards.
+    """
+    digest = hashlib.sha1(urlparse(issue_url).path.rstrip("/").encode()).hexdigest()
+
+    return int(digest, 16) % count == index
+
+
+def select_issues(issues, pattern=None, shard=None):
+    """
+    Keeps the issues matching a pattern and belonging to a shard.
+
+    :param issues: List of (year, issue URL) tuples.
+    :param pattern: Regular expression searched in the URL of the issues, None to keep all of them.
+    :param shard: Tuple of the index of the shard and the number of shards, None to keep all of them.
+    :return: The selected issues, in the same order.
+    """
+    return [(year, issue) for year, issue in issues
+            if (pattern is None or re.search(pattern, issue)) and (shard is None or in_shard(issue, *shard))]
+
+
+def shard_path(path, shard):
+    """Returns the path of the result store of a shard, next to the default one."""
+    root, extension = os.path.splitext(path)
+
+    return f"{root}.shard-{shard[0] + 1}-of-{shard[1]}{extension}"
+
+
+def open_store(backend, path, index_path):
+    """
+    Opens a result store, adding the articles written to it to the search index as well.
+
+    :param backend: The backend of the store.
+    :param path: The path of the store.
+    :param index_path: The path of the search index, None not to index the articles.
+    :return: The ResultWriter of the store.
+    """
+    writer = open_writer(backend, path)
+
+    return IndexingWriter(writer, SearchIndex(index_path)) if index_path else writer
+
+
+def crawl(args, collect=None):
+    """
+    Logs in and scrapes the selected issues into the result store.
+
+    :param args: The options of the crawl.
+    :param collect: Function returning the (year, issue URL) tuples to scrape from the logged in Journal and the
+        Checkpoint, the issues of the issue index selected by the options if not given.
+    """
+    # Imported here so merging stores does not need a browser
+    from scrapper import crawl as serial
+    from scrapper.archive import PageArchive
+    from scrapper.blobstore import BlobStore
+    from scrapper.checkpoint import Checkpoint
+    from scrapper.gender import GenderEnricher
+    from scrapper.instrumentation import RECORDER
+    from scrapper.issue_index import IssueIndex
+    from scrapper.lifecycle import DriverManager
+    from scrapper.manifest import DownloadManifest
+    from scrapper.pipeline import Pipeline
+    from scrapper.pool import IssuePool, start_browser
+    from scrapper.scrapper import Journal
+    from scrapper.session import SessionStore
+    from scrapper.throttle import RATE_CONTROLLER
+
+    # Time the WebDriver, genderize and download calls of the run
+    RECORDER.enabled = const.INSTRUMENT
+    RECORDER.trace = const.TRACE_PATH is not None
+
+    # Shards write to stores of their own, merged once every shard is done
+    output = args.output or const.RESULTS_PATHS[args.backend]
+    if args.shard is not None and args.output is None:
+        output = shard_path(output, args.shard)
+
+    # Open the checkpoint of the previous runs, finished issues and articles are not scraped again
+    checkpoint = Checkpoint()
+
+    # Open the cached gender lookup, genders are predicted in batches once an issue is scraped
+    genders = GenderEnricher()
+
+    # Open the store the scraped details are streamed to, records of previous runs are kept. The articles are added to
+    # the search index as they are written
+    writer = open_store(args.backend, output, args.index)
+
+    # Open the manifest of the images downloaded by previous runs, unchanged images are not downloaded again. Images
+    # are stored once by content and linked from their article folder
+    manifest = DownloadManifest(blobs=BlobStore())
+
+    # Open the archive the fetched pages are saved to, for the extraction to be replayed over them
+    archive = PageArchive(args.archive) if args.archive else None
+
+    # Browsers started by the run and the download session, quit and closed however the crawl ends
+    browsers = []
+    session = None
+    try:
+        # Start the web scraper for the journal
+        bot = Journal(headless=args.headless, genders=genders, profile_dir=const.PROFILE_PATH, archive=archive)
+        browsers = [bot]
+
+        with RECORDER.phase("login"):
+            # Reuse the session saved by a previous run, logging in again only if it has expired
+            bot.ensure_login(SessionStore())
+
+            # Accept any cookies if presented on the website
+            bot.accept_cookies()
+
+        # Restart the browsers every so often so they do not slow down over a long crawl, a restarted browser is
+        # headless and logged in with the cookies of the session
+        def restart_browser(cookies):
+            return start_browser(cookies, genders, archive=archive)
+
+        bot = DriverManager(restart_browser, driver=bot)
+        browsers = [bot]
+
+        # Share the authenticated cookies with a pooled HTTP session used to download images
+        session = bot.get_session()
+
+        if collect is None:
+            # Collect the issues of the years to scrape, from the issue index on disk if it is fresh, and keep those of
+            # the shard
+            issues = IssueIndex().get(bot, first_year=args.first_year, last_year=args.last_year,
+                                      refresh=args.refresh_index)
+            issues = select_issues(issues, args.issues, args.shard)
+        else:
+            issues = collect(bot, checkpoint)
+        print(f"Scraping {len(issues)} issues into {output}")
+
+        if args.mode == "pipeline":
+            # Overlap the browsing with the parsing, gender lookups, downloads and writes, on the login browser and
+            # headless browsers sharing its cookies
+            for _ in range(args.workers - 1):
+                browsers.append(DriverManager(restart_browser, bot.get_cookies()))
+            Pipeline(browsers, session, checkpoint, genders, writer, manifest=manifest).run(issues)
+        elif args.mode == "pool":
+            # Spread the issues over several headless browsers sharing the authenticated cookies
+            IssuePool(bot.get_cookies(), checkpoint, genders, writer, workers=args.workers, manifest=manifest,
+                      archive=archive).run(issues)
+        else:
+            # Scrape the issues one after the other with the login browser
+            serial.scrape_issues(bot, issues, session, checkpoint, genders, writer, manifest)
+
+        # Export the details of all the articles scraped so far, including by previous runs, to an Excel file. A shard
+        # only holds part of them, its Excel file is exported by the merge
+        if args.excel is not None or args.shard is None:
+            export_excel(writer, args.excel or const.OUT_PATH)
+
+        # Report where the time of the run went, slowest calls first
+        if RECORDER.enabled:
+            print(RECORDER.report())
+        if const.TRACE_PATH is not None:
+            RECORDER.save_trace(const.TRACE_PATH)
+
+        # Report the pace the site tolerated
+        if RATE_CONTROLLER.enabled:
+            print(RATE_CONTROLLER.report())
+    finally:
+        # Quit the browsers, so no headless Chrome is left running after an error or Ctrl+C, and close the download
+        # session, the gender cache, the checkpoint, the result store, the manifest and the archive
+        for browser in browsers:
+            try:
+                browser.quit()
+            except Exception as e:
+                print(f"Could not quit a browser: {e!r}")
+        if session is not None:
+            session.close()
+        genders.close()
+        checkpoint.close()
+        writer.close()
+        manifest.close()
+        if archive is not None:
+            archive.close()
+
+
+def watch(args):
+    """
+    Scrapes the issues published, or that gained articles, since the previous runs, appending them to the result
+    store.
+
+    The listings are first fetched over plain HTTP with the saved session, and the browser is only started and logged
+    in if there is something to scrape, so a watch with nothing new takes seconds and can run from cron.
+    """
+    from scrapper.checkpoint import Checkpoint
+    from scrapper.issue_index import IssueIndex
+    from scrapper.session import SessionStore
+    from scrapper.watch import BrowserFetcher, PageFetcher, WatchLock, changed_issues, list_issues, watched_issues
+
+    # Cron may start a watch while the previous one is still scraping
+    lock = WatchLock()
+    if not lock.acquire():
+        print(f"Another watch is running, see {lock.path}")
+        return
+
+    try:
+        def watched(issues, checkpoint):
+            issues = watched_issues(issues, checkpoint, args.first_year, args.last_year, args.recent_years)
+            return select_issues(issues, args.issues, args.shard)
+
+        checkpoint = Checkpoint()
+        fetcher = PageFetcher(SessionStore().load())
+        issues = list_issues(fetcher)
+
+        if issues is not None:
+            # The listing of every year is the issue index, refreshed for the next crawl
+            if len({year for year, _ in issues}) > 1:
+                IssueIndex().save(issues)
+
+            changed, unchecked = changed_issues(fetcher, watched(issues, checkpoint), checkpoint)
+            fetcher.close()
+            checkpoint.close()
+
+            if not changed and not unchecked:
+                print("No new or changed issues")
+                return
+
+            print(f"{len(changed)} new or changed issues, {len(unchecked)} to check with the browser")
+
+            def collect(bot, crawl_checkpoint):
+                # The issues the site did not serve over HTTP are compared with the browser, once logged in
+                return changed + changed_issues(BrowserFetcher(bot), unchecked, crawl_checkpoint)[0]
+
+            crawl(args, collect)
+        else:
+            fetcher.close()
+            checkpoint.close()
+
+            # The site does not serve the listings without a browser, compare them once logged in
+            print("The listings could not be fetched over HTTP, checking them with the browser")
+
+            def collect(bot, crawl_checkpoint):
+                issues = IssueIndex().get(bot, refresh=True)
+                return changed_issues(BrowserFetcher(bot), watched(issues, crawl_checkpoint), crawl_checkpoint)[0]
+
+            crawl(args, collect)
+    finally:
+        lock.release()
+
+
+def replay(args):
+    """Extracts the details of the archived article pages again, without a browser or the network."""
+    from scrapper.archive import PageArchive, replay as replay_archive
+    from scrapper.gender import GenderEnricher
+
+    if not args.archive or not os.path.exists(args.archive):
+        raise SystemExit(f"No page archive at {args.archive}")
+
+    archive = PageArchive(args.archive)
+    # Genders are only taken from the cache, names it does not know are left without one
+    genders = GenderEnricher()
+    writer = open_store(args.backend, args.output, args.index)
+
+    extracted, failed = replay_archive(archive, writer, genders, args.workers)
+    print(f"Extracted {extracted} articles from {args.archive} into {args.output}, {failed} failed")
+
+    if args.excel is not None:
+        export_excel(writer, args.excel)
+
+    genders.close()
+    writer.close()
+    archive.close()
+
+
+def merge(args):
+    """Combines the result stores of several shards into one, each article once with its latest details."""
+    records = {}
+    for path in args.inputs:
+        if not os.path.exists(path):
+            raise SystemExit(f"No result store at {path}")
+
+        with open_writer(detect_backend(path), path) as store:
+            for record in store.read():
+                key = schema.article_key(record)
+                records.pop(key, None)
+                records[key] = record
+
+    with open_store(args.backend, args.output, args.index) as writer:
+        writer.write_many(records.values())
+
+        print(f"Merged {len(records)} articles from {len(args.inputs)} stores into {args.output}")
+
+        if args.excel is not None:
+            export_excel(writer, args.excel)
+
+
+def index(args):
+    """Builds the search index again from a result store."""
+    if not os.path.exists(args.store):
+        raise SystemExit(f"No result store at {args.store}")
+    if not args.index:
+        raise SystemExit("No path given for the search index")
+
+    search_index = SearchIndex(args.index)
+    with open_writer(detect_backend(args.store), args.store) as store:
+        count = search_index.rebuild(store)
+    search_index.close()
+
+    print(f"Indexed {count} articles from {args.store} into {args.index}")
+
+
+def search(args):
+    """Prints the articles of the search index matching a query."""
+    if not args.index or not os.path.exists(args.index):
+        raise SystemExit(f"No search index at {args.index}, build it with the index command")
+
+    year = (args.first_year or 0, args.last_year or 9999) if args.first_year or args.last_year else args.year
+
+    search_index = SearchIndex(args.index)
+    results = search_index.search(args.text, fields=args.fields, author=args.author, affiliation=args.affiliation,
+                                  year=year, gender=args.gender, author_position=args.author_position,
+                                  limit=args.limit)
+    search_index.close()
+
+    for result in results:
+        print(f"{result['year'] or '----'}  {result['doi']}  {result['title']}")
+        if "snippet" in result:
+            print(f"      {result['field']} {result['position']}: {result['snippet']}")
+    print(f"{len(results)} articles found" if len(results) < args.limit else f"First {args.limit} articles found")
+
+
+def build_parser():
+    """Returns the parser of the command line."""
+    parser = argparse.ArgumentParser(prog="python -m scrapper",
+                                     description="Scrape the articles, authors, figures and tables of the journal.")
+    commands = parser.add_subparsers(dest="command")
+
+    crawl_parser = commands.add_parser("crawl", help="log in and scrape issues (the default command)")
+    add_crawl_arguments(crawl_parser)
+    crawl_parser.set_defaults(function=crawl)
+
+    watch_parser = commands.add_parser("watch", help="only scrape the issues that are new or gained articles since "
+                                                     "the previous runs, e.g. hourly from cron")
+    add_crawl_arguments(watch_parser)
+    watch_parser.add_argument("--recent-years", type=int, default=const.WATCH_RECENT_YEARS,
+                              help="number of years, counting the current one, whose finished issues are checked "
+                                   "for new articles")
+    watch_parser.set_defaults(function=watch)
+
+    merge_parser = commands.add_parser("merge", help="combine the result stores of shards without duplicates")
+    merge_parser.add_argument("inputs", nargs="+", help="paths of the result stores to merge, of any backend")
+    merge_parser.add_argument("--backend", choices=list(WRITERS), default=const.OUTPUT_BACKEND,
+                              help="format of the merged store")
+    merge_parser.add_argument("--output", default=None, help="path of the merged store, by default the path of the "
+                                                             "backend")
+    merge_parser.add_argument("--excel", default=const.OUT_PATH, help="path of the Excel export of the merged store")
+    add_index_arguments(merge_parser)
+    merge_parser.set_defaults(function=merge)
+
+    replay_parser = commands.add_parser("replay", help="extract the details of the archived pages again, offline")
+    replay_parser.add_argument("--archive", default=const.ARCHIVE_PATH, help="path of the page archive")
+    replay_parser.add_argument("--workers", type=int, default=None,
+                               help="number of worker processes, by default the number of CPU cores")
+    replay_parser.add_argument("--backend", choices=list(WRITERS), default=const.OUTPUT_BACKEND,
+                               help="format of the result store")
+    replay_parser.add_argument("--output", default=None, help="path of the result store, by default the path of "
+                                                              "the backend")
+    replay_parser.add_argument("--excel", default=const.OUT_PATH, help="path of the Excel export")
+    add_index_arguments(replay_parser)
+    replay_parser.set_defaults(function=replay)
+
+    index_parser = commands.add_parser("index", help="build the search index again from a result store")
+    index_parser.add_argument("--store", default=None, help="path of the result store, of any backend, by default "
+                                                            "the path of the default backend")
+    index_parser.add_argument("--index", default=const.SEARCH_INDEX_PATH, help="path of the search index")
+    index_parser.set_defaults(function=index)
+
+    search_parser = commands.add_parser("search", help="search the titles, captions, authors and affiliations of the "
+                                                       "scraped articles")
+    search_parser.add_argument("text", nargs="?", help="full-text query, e.g. 'fmri OR \"eye tracking\"'")
+    search_parser.add_argument("--in", dest="fields", nargs="+", choices=FIELDS, default=list(TEXT_FIELDS),
+                               help="fields the text is searched in, the title and the captions by default")
+    search_parser.add_argument("--author", help="words of the name of one of the authors")
+    search_parser.add_argument("--affiliation", help="words of the affiliation of one of the authors")
+    search_parser.add_argument("--year", type=int, help="year of publication")
+    search_parser.add_argument("--first-year", type=int, help="first year of publication")
+    search_parser.add_argument("--last-year", type=int, help="last year of publication")
+    search_parser.add_argument("--gender", choices=["male", "female"], help="gender of one of the authors")
+    search_parser.add_argument("--author-position", choices=["first", "last"],
+                               help="only consider the gender of the first or the last author, with --gender")
+    search_parser.add_argument("--limit", type=int, default=const.SEARCH_LIMIT, help="maximum number of results")
+    search_parser.add_argument("--index", default=const.SEARCH_INDEX_PATH, help="path of the search index")
+    search_parser.set_defaults(function=search)
+
+    return parser
+
+
+def add_crawl_arguments(parser):
+    """Adds the options of the commands scraping issues."""
+    parser.add_argument("--first-year", type=int, default=const.FIRST_YEAR, help="first year to scrape")
+    parser.add_argument("--last-year", type=int, default=const.LAST_YEAR, help="last year to scrape")
+    parser.add_argument("--issues", metavar="REGEX",
+                        help="only scrape the issues whose URL matches, e.g. '/toc/pps/15/'")
+    parser.add_argument("--shard", type=parse_shard, metavar="i/N",
+                        help="only scrape the i-th of N disjoint parts of the issues, e.g. 1/4, to spread a "
+                             "crawl over processes or hosts")
+    parser.add_argument("--headless", action="store_true", help="run the login browser without a window")
+    parser.add_argument("--backend", choices=list(WRITERS), default=const.OUTPUT_BACKEND,
+                        help="format of the result store")
+    parser.add_argument("--output", help="path of the result store, by default the path of the backend, suffixed "
+                                         "with the shard when sharding")
+    parser.add_argument("--excel", help="path of the Excel export, not exported for a shard unless given")
+    parser.add_argument("--mode", choices=["pipeline", "pool", "serial"], default=const.CRAWL_MODE,
+                        help="how issues are crawled")
+    parser.add_argument("--workers", type=int, default=const.WORKERS, help="number of browsers")
+    parser.add_argument("--archive", default=const.ARCHIVE_PATH,
+                        help="path of the archive the fetched pages are saved to")
+    parser.add_argument("--no-archive", dest="archive", action="store_const", const=None,
+                        help="do not archive the fetched pages")
+    parser.add_argument("--refresh-index", action="store_true",
+                        help="browse the issues again even if the issue index is fresh")
+    add_index_arguments(parser)
+
+
+def add_index_arguments(parser):
+    """Adds the options of the search index updated by a command writing articles."""
+    parser.add_argument("--index", default=const.SEARCH_INDEX_PATH,
+                        help="path of the search index the written articles are added to")
+    parser.add_argument("--no-index", dest="index", action="store_const", const=None,
+                        help="do not add the written articles to the search index")
+
+
+def main(argv=None):
+    """
+    Runs a command of the command line, crawling with the settings of scrapper/constants.py when none is given.
+
+    :param argv: The arguments, those of the process if not given.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    # The options of a crawl can be given without the command
+    if not argv or argv[0] not in ("crawl", "watch", "merge", "replay", "index", "search", "-h", "--help"):
+        argv = ["crawl", *argv]
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == "search" and args.author_position is not None and args.gender is None:
+        parser.error("--author-position only applies to --gender")
+
+    if args.command in ("merge", "replay") and args.output is None:
+        args.output = const.RESULTS_PATHS[args.backend]
+    if args.command == "index" and args.store is None:
+        args.store = const.RESULTS_PATHS[const.OUTPUT_BACKEND]
+
+    args.function(args)
@@ -2,3 +2,190 @@ import os
 
 OUT_PATH = os.path.abspath("data/output.xlsx")
 IMAGE_PATH = os.path.abspath("data/Photos")
+
+# Number of images downloaded in parallel for a single article
+DOWNLOAD_WORKERS = 8
+# Number of times a failed image download is retried before giving up
+DOWNLOAD_RETRIES = 3
+
+# SQLite database caching the predicted gender of author first names
+GENDER_CACHE_PATH = os.path.abspath("data/genders.sqlite")
+# Number of seconds after which a cached gender is looked up again (30 days)
+GENDER_CACHE_TTL = 30 * 24 * 60 * 60
+# Number of names sent in a single genderize request, the API accepts at most 10
+GENDER_BATCH_SIZE = 10
+
+# SQLite database recording the issues and articles already scraped, to resume an interrupted crawl
+CHECKPOINT_PATH = os.path.abspath("data/checkpoint.sqlite")
+
+# Number of seconds a write to one of the SQLite databases waits for another process, e.g. a shard, to finish its own
+SQLITE_TIMEOUT = 120
+
+# The columns of the summary sheet of the Excel output, in order. Every author, figure and table of the articles is
+# in a sheet of its own, see scrapper.schema
+COLUMNS = [
+    "Paper title",
+    "Paper DOI",
+    "Publication Date",
+    "Number of authors",
+    "Name of the first author",
+    "Name of the last author",
+    "Gender of the first author",
+    "Gender of the last author",
+    "First author gender probability",
+    "Last author gender probability",
+    "Affiliation of the first author",
+    "Affiliation of the last author",
+    "Number of Images",
+    "Number of Tables",
+]
+
+# Backend of the store the results are streamed to: "csv", "jsonl", "sqlite" or "parquet"
+OUTPUT_BACKEND = "sqlite"
+# Path of the result store for each backend, the Excel file at OUT_PATH is exported from it. The CSV and Parquet
+# stores are directories holding the articles, authors, figures and tables relations
+RESULTS_PATHS = {
+    "csv": os.path.abspath("data/results_csv"),
+    "jsonl": os.path.abspath("data/results.jsonl"),
+    "sqlite": os.path.abspath("data/results.sqlite"),
+    "parquet": os.path.abspath("data/results.parquet"),
+}
+# Number of records buffered before a Parquet row group is written
+PARQUET_ROW_GROUP_SIZE = 500
+
+# Number of headless browsers scraping issues in parallel, 1 scrapes with the login browser alone
+WORKERS = 4
+# Number of times an issue is attempted by the workers before giving up on it until the next run
+ISSUE_ATTEMPTS = 3
+
+# Whether the WebDriver, genderize and download calls are timed and reported at the end of a run
+INSTRUMENT = True
+# Path of the trace file of all the timed calls, viewable in chrome://tracing or Perfetto, None to skip it
+TRACE_PATH = None
+
+# JSON file indexing the issues of every year, so runs can skip browsing the "All Issues" section
+ISSUE_INDEX_PATH = os.path.abspath("data/issue_index.json")
+# Number of seconds after which the issue index is built again (1 day)
+ISSUE_INDEX_TTL = 24 * 60 * 60
+# Range of years to scrape, None for no bound
+FIRST_YEAR = None
+LAST_YEAR = None
+
+# JSON file holding the cookies of the last authenticated session, reused until they expire
+SESSION_PATH = os.path.abspath("data/session.json")
+# Chrome profile directory of the login browser, None for a fresh profile on every run
+PROFILE_PATH = None
+# Institution used for the login, shown on the journal's pages once logged in
+INSTITUTION = "Bar-Ilan University"
+# Maximum number of seconds to wait for the code verification of the login
+LOGIN_TIMEOUT = 120
+
+# How issues are crawled: "pipeline" overlaps the stages of the crawl, "pool" scrapes whole issues on WORKERS
+# browsers in parallel, "serial" scrapes them one after the other with the login browser
+CRAWL_MODE = "pipeline"
+# Number of workers of each stage of the pipeline, the browser stages share WORKERS browsers
+PIPELINE_CONCURRENCY = {
+    "listing": 1,
+    "extraction": WORKERS,
+    "enrichment": 1,
+    "download": 4,
+    "writing": 1,
+}
+# Maximum number of items waiting between two stages of the pipeline
+PIPELINE_QUEUE_SIZE = 32
+
+# SQLite database recording the images already downloaded, with their size, HTTP validators and hash
+MANIFEST_PATH = os.path.abspath("data/manifest.sqlite")
+# Whether images already downloaded are checked for changes with a conditional request instead of being skipped
+DOWNLOAD_REVALIDATE = True
+
+# Directory storing every image once under the hash of its content, the folders of IMAGE_PATH link to it
+BLOB_PATH = os.path.abspath("data/Blobs")
+
+# When the browser hands a page over: "eager" once the HTML is parsed, without waiting for images and stylesheets,
+# "normal" once everything is loaded
+PAGE_LOAD_STRATEGY = "eager"
+# Whether the browser blocks the resources of RESOURCE_POLICIES, through the Chrome DevTools protocol
+BLOCK_RESOURCES = True
+# URL patterns of each type of resource, the DevTools protocol blocks resources by URL
+RESOURCE_PATTERNS = {
+    "image": ["*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.svg*", "*.ico*"],
+    "font": ["*.woff*", "*.woff2*", "*.ttf*", "*.otf*", "*.eot*"],
+    "stylesheet": ["*.css*"],
+    "media": ["*.mp4*", "*.webm*", "*.mp3*"],
+    "tracking": ["*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+                 "*scorecardresearch.com*", "*hotjar.com*", "*facebook.net*", "*twitter.com/i/*", "*altmetric.com*",
+                 "*crossref.org/widget*", "*adobedtm.com*", "*omtrdc.net*"],
+}
+# Resources blocked on each kind of page: the types of RESOURCE_PATTERNS, and other URL patterns. Scripts are
+# never blocked, the journal and Cloudflare need them, and the login flow loads everything
+RESOURCE_POLICIES = {
+    "login": {"types": [], "patterns": []},
+    # The "All Issues" tabs are switched by clicking, so their stylesheets are kept
+    "listing": {"types": ["image", "font", "media", "tracking"], "patterns": []},
+    # The details only need the DOM, the images are downloaded from the src of their tag
+    "article": {"types": ["image", "font", "stylesheet", "media", "tracking"], "patterns": []},
+}
+
+# Whether the requests of the browsers and of the downloads are paced host by host, adapting to the site's responses
+THROTTLE = True
+# Requests per second to a host: at the start, lowest and highest, and the number of requests allowed in a burst
+RATE_INITIAL = 2.0
+RATE_MIN = 0.1
+RATE_MAX = 20.0
+RATE_BURST = 4
+# Requests per second added after each request answered in time, and factor applied to the rate and the number of
+# requests in flight after an error, a throttled response, a Cloudflare challenge or a slow answer
+RATE_INCREASE = 0.1
+RATE_DECREASE = 0.5
+# Number of seconds after which an answer is too slow and slows the host down
+RATE_LATENCY_TARGET = 10.0
+# Number of seconds after a decrease during which the requests already in flight do not decrease the rate again
+RATE_COOLDOWN = 5.0
+# Number of requests in flight to a host: at the start and highest
+CONCURRENCY_INITIAL = 4
+CONCURRENCY_MAX = 16
+# Number of times a throttled request is retried, and the first and longest backoff between attempts, in seconds
+RATE_RETRIES = 4
+RATE_BACKOFF = 2.0
+RATE_BACKOFF_MAX = 60.0
+
+# SQLite database archiving the compressed HTML of every issue and article page fetched, None not to archive them
+ARCHIVE_PATH = os.path.abspath("data/pages.sqlite")
+# zlib compression level of the archived pages, from 1 (fastest) to 9 (smallest)
+ARCHIVE_COMPRESSION = 9
+# Number of archived pages handed to the worker processes at a time when replaying the extraction
+REPLAY_BATCH_SIZE = 512
+
+# Number of pages after which a browser is restarted with the session of the previous one, None for no limit
+DRIVER_MAX_PAGES = 500
+# Memory, in bytes, past which a browser is restarted, None for no limit. Measured over all the browser's processes
+# when psutil is installed, over the JavaScript heap of the page otherwise
+DRIVER_MAX_MEMORY = 1536 * 2 ** 20
+# Number of pages between two measures of the memory of a browser
+DRIVER_MEMORY_CHECK_INTERVAL = 25
+# Number of tabs past which the tabs other than the working one are closed
+DRIVER_MAX_HANDLES = 2
+
+# SQLite database of the full-text and lookup index over the scraped articles, updated as they are written, None not
+# to index them
+SEARCH_INDEX_PATH = os.path.abspath("data/search.sqlite")
+# Number of articles indexed per transaction when the index is rebuilt from a result store
+SEARCH_BATCH_SIZE = 1000
+# Maximum number of results of a search
+SEARCH_LIMIT = 50
+
+# Number of years, counting the current one, whose finished issues the watch checks for new articles. Issues never
+# finished are checked whatever their year
+WATCH_RECENT_YEARS = 2
+# URLs of issues the watch checks on top of those of the "All Issues" page, e.g. the Online First issue of the journal
+WATCH_ISSUES = []
+# User-Agent the watch fetches the listings with over plain HTTP, before any browser is started
+WATCH_USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                    "Chrome/120.0.0.0 Safari/537.36")
+# Number of seconds the watch waits for a listing over plain HTTP
+WATCH_TIMEOUT = 30
+# Lock file keeping two watches from running at once, and number of seconds after which a lock left behind by a
+# crashed watch is ignored
+WATCH_LOCK_PATH = os.path.abspath("data/watch.lock")
+WATCH_LOCK_TTL = 12 * 60 * 60
@@ -0,0 +1,169 @@
+import os
+
+from scrapper import file_handling
+from scrapper.checkpoint import fingerprint
+from scrapper.constants import IMAGE_PATH
+from scrapper.gender import GenderLookupError
+from scrapper.instrumentation import RECORDER
+
+
+def collect_issues(bot):
+    """
+    Collects the issues of every year by clicking through the decades and years of the "All Issues" section.
+
+    :param bot: The Journal, on the "All Issues" section.
+    :return: List of (year, issue URL) tuples, the issues of each year in reverse order.
+    """
+    issues = []
+
+    with RECORDER.phase("issue listing"):
+        # Fetch the available decades from the "All Issues" section
+        decades = bot.get_decades()
+
+        # Iterate over each decade
+        for decade_index in range(len(decades)):
+            # Click on the specific decade to see its years
+            decades[decade_index].click()
+
+            # Fetch the list of years available in the clicked decade
+            years = bot.get_years()
+
+            # Iterate over each year in the clicked decade
+            for year_index in range(len(years)):
+                # Re-fetch the years each time to avoid stale references
+                year = years[year_index]
+
+                # Store year
+                year_text = year.text
+
+                # Click on the specific year
+                year.click()
+
+                # Fetch the journal issues for the clicked year
+                issues += [(year_text, issue) for issue in reversed(bot.get_issues(year_text))]
+
+    return issues
+
+
+def article_dir(details, year):
+    """
+    Returns the directory the images of an article are stored in.
+
+    :param details: The dictionary returned by Journal.get_details.
+    :param year: The year of the issue of the article.
+    """
+    title = details['Paper title']
+    invalid_chars = ['<', '>', ':', '"', '/', '\\', '|', '?', '*']
+    for char in invalid_chars:
+        title = title.replace(char, '_')
+
+    return os.path.join(IMAGE_PATH, year, title)
+
+
+def scrape_issue(bot, year, issue_url, session, checkpoint, genders, writer, manifest=None):
+    """
+    Scrapes the articles of an issue that are not in the checkpoint yet, downloads their images and writes them.
+
+    :param bot: The Journal used to open the pages.
+    :param year: The year of the issue.
+    :param issue_url: The URL of the issue.
+    :param session: The authenticated session used to download the images, refreshed with the cookies of the bot.
+    :param checkpoint: The Checkpoint of the crawl.
+    :param genders: The GenderEnricher predicting the gender of the authors.
+    :param writer: The ResultWriter the details of the articles are written to.
+    :param manifest: The DownloadManifest of the images, images it records as downloaded are skipped.
+    :return: True if every article of the issue has been scraped, False if some have to be retried.
+    """
+
+    with RECORDER.phase("issue listing"):
+        # Open the link for the specific issue
+        bot.open_link(issue_url, "listing")
+
+        # Fetch all articles available in the issue
+        articles = bot.get_articles()
+
+    # Refresh the session cookies, Cloudflare's __cf_bm cookie expires after 30 minutes
+    bot.get_session(session)
+
+    # Details of the articles of this issue, waiting for the gender of their authors, keyed by their URL
+    issue_details = {}
+
+    # Whether an article of this issue could not be scraped and has to be retried on the next run
+    issue_failed = False
+
+    # If there are any articles, iterate over each one
+    for article_url in articles or []:
+        # Skip the articles scraped by a previous run, e.g. before a crash in the middle of the issue
+        if checkpoint.is_article_done(article_url):
+            continue
+
+        try:
+            with RECORDER.phase("article"):
+                # Open the link for the specific article
+                bot.open_link(article_url, "article")
+
+                # Extract details of the article, the gender of the authors is predicted later in a batch
+                details = bot.get_details(enrich_gender=False)
+
+            # Extract the image links of the article
+            image_links = [image["Link"] for image in details["Images"] if image["Link"]]
+
+            # Checks if list contains image
+            if image_links:
+                # Create image folder
+                destination = article_dir(details, year)
+                file_handling.create_dir(destination)
+
+                # Download all the images of the article concurrently
+                with RECORDER.phase("image"):
+                    failures = file_handling.download_files(image_links, destination, session, manifest=manifest)
+                if failures:
+                    raise RuntimeError(f"{len(failures)} image(s) could not be downloaded")
+        except Exception as e:
+            # Record the failure and carry on with the rest of the issue
+            print(f"Failed to scrape {article_url}: {e}")
+            checkpoint.mark_article_failed(article_url, issue_url, e)
+            issue_failed = True
+            continue
+
+        issue_details[article_url] = details
+
+    # Predict the gender of all the authors of the issue with as few genderize requests as possible
+    with RECORDER.phase("gender"):
+        try:
+            genders.enrich(list(issue_details.values()))
+        except GenderLookupError as e:
+            # Scrape the articles of the issue again on the next run rather than writing them without genders
+            print(f"Failed to predict the genders of the authors of {issue_url}: {e}")
+            for article_url in issue_details:
+                checkpoint.mark_article_failed(article_url, issue_url, e)
+            return False
+
+    # Write and record the scraped articles, then the issue once none of its articles is left to retry
+    for article_url, details in issue_details.items():
+        writer.write(details)
+        checkpoint.mark_article_done(article_url, issue_url, details)
+    if not issue_failed:
+        checkpoint.mark_issue_done(issue_url, year, fingerprint(articles))
+
+    return not issue_failed
+
+
+def scrape_issues(bot, issues, session, checkpoint, genders, writer, manifest=None):
+    """
+    Scrapes issues one after the other with a single Journal.
+
+    :param bot: The Journal used to open the pages.
+    :param issues: List of (year, issue URL) tuples, as returned by collect_issues.
+    :param session: The authenticated session used to download the images.
+    :param checkpoint: The Checkpoint of the crawl, issues it records as done are skipped.
+    :param genders: The GenderEnricher predicting the gender of the authors.
+    :param writer: The ResultWriter the details of the articles are written to.
+    :param manifest: The DownloadManifest of the images, images it records as downloaded are skipped.
+    """
+    for year, issue_url in issues:
+        # Skip the issues whose articles were all scraped by a previous run
+        if checkpoint.is_issue_done(issue_url):
+            continue
+
+        scrape_issue(bot, year, issue_url, session, checkpoint, genders, writer, manifest)
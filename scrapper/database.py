@@ -0,0 +1,20 @@
+import sqlite3
+
+import scrapper.constants as const
+
+
+def connect(path, timeout=const.SQLITE_TIMEOUT):
+    """
+    Opens a SQLite database shared by the threads of a crawl and by the other crawls of the machine, e.g. its shards.
+
+    The database is put in write-ahead logging mode, so reading never waits for a write, and a write waits for the
+    write of another connection for up to the timeout instead of failing with "database is locked".
+
+    :param path: The path of the database.
+    :param timeout: The number of seconds a write waits for the database to be unlocked.
+    :return: The sqlite3.Connection, usable from any thread.
+    """
+    connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+
+    return connection
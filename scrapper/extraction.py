@@ -0,0 +1,187 @@
+import re
+
+import lxml.html
+
+
+class ExtractionError(Exception):
+    """Raised when an element the extraction relies on is missing from the page."""
+
+
+def parse_page(html, url):
+    """
+    Parses the HTML of a page.
+
+    :param html: The HTML of the page.
+    :param url: The URL of the page, used to resolve relative links like WebDriver does.
+    :return: The root element of the page.
+    """
+    root = lxml.html.fromstring(html, base_url=url)
+    root.make_links_absolute(url)
+
+    return root
+
+
+def text(element):
+    """Returns the text of an element with its whitespace collapsed, like WebElement.text."""
+    return " ".join(element.text_content().split())
+
+
+def find(element, xpath):
+    """
+    Returns the first element matching the XPath, like WebDriver's find_element.
+
+    :raises ExtractionError: If no element matches.
+    """
+    matches = element.xpath(xpath)
+    if not matches:
+        raise ExtractionError(f"No element matches {xpath}")
+
+    return matches[0]
+
+
+def author_name(author):
+    """Returns the full name of an author element."""
+    return text(find(author, ".//span[@property='givenName']")) + " " + \
+        text(find(author, ".//span[@property='familyName']"))
+
+
+def affiliation_index(position, authors, affiliations):
+    """
+    Returns which of the affiliations listed by the page is the one of an author, on pages listing one affiliation
+    per author in the order of the authors.
+
+    The last author has the last affiliation even when the page lists fewer or more affiliations than authors.
+
+    :param position: The position of the author, from 0.
+    :param authors: The number of authors.
+    :param affiliations: The number of affiliations.
+    :return: The index of the affiliation, or None if the author has none.
+    """
+    if position > 0 and position == authors - 1 and affiliations:
+        return affiliations - 1
+
+    return position if position < affiliations else None
+
+
+def author_affiliations(authors, affiliations):
+    """
+    Returns the affiliations of each author.
+
+    Affiliations nested in the element of an author are theirs. Otherwise the page lists one affiliation per author,
+    see affiliation_index.
+
+    :param authors: The author elements.
+    :param affiliations: The affiliation elements of the page.
+    :return: List of the affiliation names of each author.
+    """
+    nested = [author.xpath(".//*[@property='affiliation']") for author in authors]
+    if any(nested):
+        return [[affiliation_name(affiliation) for affiliation in elements] for elements in nested]
+
+    indexes = [affiliation_index(i, len(authors), len(affiliations)) for i in range(len(authors))]
+
+    return [[affiliation_name(affiliations[index])] if index is not None else [] for index in indexes]
+
+
+def affiliation_name(affiliation):
+    """Returns the raw text content of the name of an affiliation element."""
+    return find(affiliation, ".//span[@property='name']").text_content()
+
+
+def parse_details(html, url):
+    """
+    Extracts the details of an article from the HTML of its page.
+
+    The gender of the authors is left out, see scrapper.gender.
+
+    :param html: The HTML of the article page.
+    :param url: The URL of the article page.
+    :return: Dictionary with the details of the article, as returned by Journal.get_details.
+    """
+    root = parse_page(html, url)
+
+    # Initializing an empty dictionary to store the details
+    details = {}
+
+    # Extracting all authors and affiliations
+    authors = root.xpath("//span[@property='author']")
+    affiliations = root.xpath("//div[@property='affiliation']")
+
+    # Extracting all images and tables, the figures appear twice in the page so only the first half is kept
+    images = root.xpath("//figure[@class='graphic']")
+    images = images[:int(len(images) / 2)]
+    tables = root.xpath("//figure[@class='table']")
+    tables = tables[:int(len(tables) / 2)]
+
+    # Populating the 'details' dictionary
+    details["Paper title"] = text(find(root, "//h1[@property='name']"))
+    details["Paper DOI"] = find(root, "//div[@class='doi']//a").get("href")
+    details["Publication Date"] = text(find(root, "//div[@class='meta-panel__onlineDate']")).split(
+        "First published online ")[1]
+
+    # Storing every author with their affiliations, in the order of the article
+    if not authors:
+        raise ExtractionError("The article has no author")
+    details["Authors"] = [{"Name": author_name(author), "Affiliations": names}
+                          for author, names in zip(authors, author_affiliations(authors, affiliations))]
+
+    # Storing the caption and link of each image, and the caption of each table
+    details["Images"] = [{"Caption": text(find(image, ".//figcaption")), "Link": find(image, ".//img").get("src")}
+                         for image in images]
+    details["Tables"] = [{"Caption": text(find(table, ".//figcaption"))} for table in tables]
+
+    return details
+
+
+def parse_articles(html, url):
+    """
+    Extracts the article links of the "Regular Articles" section from the HTML of an issue page.
+
+    The section is followed by sibling sections holding one article each, until the next section with a heading.
+
+    :param html: The HTML of the issue page.
+    :param url: The URL of the issue page.
+    :return: List of the URLs of the articles, or None if the issue has no "Regular Articles" section.
+    """
+    root = parse_page(html, url)
+
+    sections = root.xpath("//section[h4[text()='Regular Articles']]")
+    if not sections:
+        return None
+
+    # Collect the section and the following ones until one contains a heading
+    sections_to_collect = [sections[0]]
+    for sibling in sections[0].itersiblings("section"):
+        if sibling.xpath(".//h4"):
+            break
+        sections_to_collect.append(sibling)
+
+    # Extract article links from the collected sections
+    try:
+        return [find(section, ".//a").get("href") for section in sections_to_collect]
+    except ExtractionError:
+        return None
+
+
+def parse_issue_index(html, url):
+    """
+    Extracts the issues of every year from the HTML of the "All Issues" section, including the hidden tabs.
+
+    The issues of a year are the links inside the tab whose id ends with the year.
+
+    :param html: The HTML of the "All Issues" page.
+    :param url: The URL of the "All Issues" page.
+    :return: List of (year, issue URL) tuples, the issues of each year in reverse order like crawl.collect_issues.
+    """
+    root = parse_page(html, url)
+
+    # Issues grouped by year, in the order of the page
+    years = {}
+    for link in root.xpath("//a[@class='loi__issue__link']"):
+        for pane in link.iterancestors("div"):
+            year = re.search(r"(\d{4})$", pane.get("id", ""))
+            if year:
+                years.setdefault(year.group(1), []).append(link.get("href"))
+                break
+
+    return [(year, issue) for year, issues in years.items() for issue in reversed(issues)]
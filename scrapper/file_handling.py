@@ -1,16 +1,106 @@
+import hashlib
 import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+import scrapper.constants as const
+from scrapper.instrumentation import RECORDER
+from scrapper.throttle import RATE_CONTROLLER, throttled_response
 
-def download_file(url, destination, cookie):
+
+def create_session(cookies, user_agent, pool_size=const.DOWNLOAD_WORKERS, retries=const.DOWNLOAD_RETRIES):
+    """
+    Create a pooled HTTP session that reuses the cookies of an authenticated browser.
+
+    :param cookies: The cookies of the browser, as returned by WebDriver's get_cookies().
+    :param user_agent: The User-Agent of the browser the cookies were issued to.
+    :param pool_size: The number of keep-alive connections kept open per host.
+    :param retries: The number of times a failed request is retried.
+    :return: A requests.Session ready to download files.
+    """
+
+    session = requests.Session()
+
+    # Retry connection errors with an exponential backoff, throttled responses are retried by the rate controller
+    retry = Retry(total=retries, backoff_factor=0.5, allowed_methods=frozenset(["GET"]))
+
+    # Keep a pool of connections open so consecutive downloads skip the TCP/TLS handshake
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    # Present ourselves as the same browser the cookies were issued to
+    session.headers['User-Agent'] = user_agent
+
+    update_cookies(session, cookies)
+
+    return session
+
+
+def update_cookies(session, cookies):
+    """
+    Copy the cookies of the browser into the session, replacing any older values.
+
+    :param session: The session to update.
+    :param cookies: The cookies of the browser, as returned by WebDriver's get_cookies().
+    """
+
+    for cookie in cookies:
+        session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''),
+                            path=cookie.get('path', '/'))
+
+
+def adopt_file(url, path, manifest, etag=None, last_modified=None):
+    """
+    Records a file downloaded before the manifest existed, e.g. by the first runs, so it is not downloaded again.
+
+    :param url: The URL of the file.
+    :param path: The path of the file on disk, moved to its blob and linked back when the manifest has a BlobStore.
+    :param manifest: The DownloadManifest to record the file in.
+    :param etag: The ETag the server gave for the file, if any.
+    :param last_modified: The Last-Modified date the server gave for the file, if any.
+    """
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            hasher.update(chunk)
+
+    stored = path
+    if manifest.blobs is not None:
+        # Store a link to the file, the file itself is then replaced by a link to the blob
+        temp_path = manifest.blobs.temp_path(url) + ".adopted"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        try:
+            os.link(path, temp_path)
+        except OSError:
+            shutil.copyfile(path, temp_path)
+        stored = manifest.blobs.store(temp_path, hasher.hexdigest(), os.path.splitext(path)[1])
+        manifest.blobs.link(stored, path)
+
+    manifest.put(url, stored, os.path.getsize(stored), etag, last_modified, hasher.hexdigest())
+
+
+def download_file(url, destination, session, manifest=None, revalidate=const.DOWNLOAD_REVALIDATE):
     """
     Download a file from the specified URL and save it to the provided destination.
 
+    With a manifest, a file already downloaded completely is skipped, after a conditional request when the server
+    gave an ETag or a Last-Modified date, and a file found at its destination without being in the manifest is
+    recorded instead of downloaded once a HEAD request confirms its size. A partial download left by an interrupted
+    run is resumed with a Range request.
+
     :param url: The URL of the file to download.
     :param destination: The path where the file should be saved.
-    :param cookie: The cookies for accessing the file
+    :param session: The authenticated session used to download the file.
+    :param manifest: The DownloadManifest recording the completed downloads, if any.
+    :param revalidate: Flag to determine whether complete files are checked for changes with a conditional request.
     """
 
     # Extract the base file name from the URL
@@ -19,22 +109,134 @@ def download_file(url, destination, cookie):
     # Join the destination path with the file name
     destination = os.path.join(destination, file_name)
 
-    # Define request headers, including User-Agent and Cookie for the request
-    headers = {
-        'User-Agent': "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36",
-        'Cookie': f"__cf_bm={cookie}",
-    }
+    # Content-addressed store of the files, if any
+    blobs = manifest.blobs if manifest is not None else None
+
+    # The file is written to a temporary file and renamed once complete
+    partial = blobs.temp_path(url) if blobs is not None else destination + ".part"
+    offset = 0
+
+    headers = {}
+    entry = manifest.get(url) if manifest is not None else None
+
+    if entry is None and manifest is not None and os.path.isfile(destination) and os.path.getsize(destination):
+        # Downloaded before the downloads were recorded, when files were written to their destination directly, so an
+        # interrupted run left them truncated. Keep the file only if it has the size the server gives
+        with RECORDER.timer("download"):
+            response = RATE_CONTROLLER.call(url, lambda: session.head(url, allow_redirects=True), throttled_response)
+        if response.ok and response.headers.get("Content-Length") == str(os.path.getsize(destination)):
+            adopt_file(url, destination, manifest, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            return
+
+        # Otherwise resume it like a partial download, it is downloaded again if it is not a prefix of the file
+        if os.path.exists(partial):
+            os.remove(destination)
+        else:
+            shutil.move(destination, partial)
+
+    if entry is not None and os.path.exists(entry["path"]) and os.path.getsize(entry["path"]) == entry["size"] and \
+            (blobs is not None or entry["path"] == destination):
+        # Point the destination to the stored blob
+        if blobs is not None:
+            blobs.link(entry["path"], destination)
+
+        # Skip the complete file, unless the server may tell whether it changed
+        if not revalidate or not (entry["etag"] or entry["last_modified"]):
+            return
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+    elif os.path.exists(partial):
+        # Resume the partial download
+        offset = os.path.getsize(partial)
+        headers["Range"] = f"bytes={offset}-"
+
+    # Send a GET request to the provided URL at the pace the host tolerates, streaming the body instead of loading it
+    # in memory
+    with RECORDER.timer("download"), RATE_CONTROLLER.call(
+            url, lambda: session.get(url, headers=headers, stream=True), throttled_response) as response:
+        # The file did not change since it was downloaded
+        if response.status_code == 304:
+            return
+
+        # Nothing is left to download past the partial file: it is either complete, interrupted just before being
+        # renamed, or longer than the file on the server, which then changed
+        complete = False
+        if response.status_code == 416 and offset:
+            total = re.fullmatch(r"bytes \*/(\d+)", response.headers.get("Content-Range", ""))
+            if total is None or int(total.group(1)) != offset:
+                os.remove(partial)
+                return download_file(url, os.path.dirname(destination), session, manifest, revalidate)
+            complete = True
+        else:
+            # Check if the HTTP response indicates an error, and if so, raise an exception
+            response.raise_for_status()
+
+        hasher = hashlib.sha256()
+
+        # Append to the partial file only if the server sent the missing part, otherwise start over
+        resumed = complete or (response.status_code == 206 and
+                               response.headers.get("Content-Range", "").startswith(f"bytes {offset}-"))
+        if resumed:
+            with open(partial, "rb") as f:
+                for chunk in iter(lambda: f.read(65536), b""):
+                    hasher.update(chunk)
+
+        # Save the content of the response to the destination file in chunks
+        if not complete:
+            with open(partial, "ab" if resumed else "wb") as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    f.write(chunk)
+                    hasher.update(chunk)
+
+        # Store the file under the hash of its content and link it from its destination, or move it there
+        if blobs is not None:
+            path = blobs.store(partial, hasher.hexdigest(), os.path.splitext(file_name)[1])
+            blobs.link(path, destination)
+        else:
+            path = destination
+            os.replace(partial, destination)
+
+        if manifest is not None:
+            manifest.put(url, path, os.path.getsize(path), response.headers.get("ETag"),
+                         response.headers.get("Last-Modified"), hasher.hexdigest())
+
+
+def download_files(urls, destination, session, max_workers=const.DOWNLOAD_WORKERS, manifest=None):
+    """
+    Download several files concurrently into the same destination.
+
+    A failed download does not stop the others, the failures are returned instead.
+
+    :param urls: The URLs of the files to download.
+    :param destination: The path where the files should be saved.
+    :param session: The authenticated session used to download the files.
+    :param max_workers: The maximum number of downloads running at the same time.
+    :param manifest: The DownloadManifest recording the completed downloads, files it records are skipped.
+    :return: Dictionary mapping each URL that failed to the exception it raised.
+    """
+
+    failures = {}
+
+    # Download threads are tagged with the phase of the calling thread
+    phase = RECORDER.current_phase()
+
+    def download(url):
+        with RECORDER.phase(phase):
+            download_file(url, destination, session, manifest)
 
-    # Send a GET request to the provided URL with the headers
-    response = requests.get(url, headers=headers)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {url: executor.submit(download, url) for url in urls}
 
-    # Check if the HTTP response indicates an error, and if so, raise an exception
-    response.raise_for_status()
+        for url, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Failed to download {url}: {e}")
+                failures[url] = e
 
-    # Save the content of the response to the destination file in chunks
-    with open(destination, 'wb') as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            f.write(chunk)
+    return failures
 
 
 def create_dir(path):
@@ -0,0 +1,146 @@
+import threading
+import time
+
+from genderize import Genderize
+
+import scrapper.constants as const
+from scrapper.database import connect
+from scrapper.instrumentation import RECORDER
+
+
+def normalize_name(full_name):
+    """
+    Returns the key under which the gender of an author is cached.
+
+    :param full_name: The full name of the author, first name first.
+    :return: The lower-cased first name, or None if the name is empty.
+    """
+    parts = full_name.split() if full_name else []
+
+    return parts[0].strip(".,").lower() if parts else None
+
+
+class GenderLookupError(Exception):
+    """Raised when genderize could not predict the gender of some names, e.g. once its rate limit is reached."""
+
+
+class GenderCache:
+    """On-disk cache of genderize results, keyed by normalized first name."""
+
+    def __init__(self, path=const.GENDER_CACHE_PATH, ttl=const.GENDER_CACHE_TTL):
+        """
+        :param path: The path of the SQLite database holding the cache.
+        :param ttl: The number of seconds after which a cached result is looked up again.
+        """
+        self.ttl = ttl
+        # The cache is shared by the download and scraping threads
+        self.lock = threading.Lock()
+        self.connection = connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS genders ("
+                                "name TEXT PRIMARY KEY, gender TEXT, probability REAL, fetched_at REAL)")
+        self.connection.commit()
+
+    def get_many(self, names, expired=False):
+        """
+        Returns the cached results that have not expired yet.
+
+        :param names: The normalized names to look up.
+        :param expired: Flag to determine whether expired results are returned too.
+        :return: Dictionary mapping each cached name to its result.
+        """
+        names = list(names)
+        if not names:
+            return {}
+
+        placeholders = ",".join("?" * len(names))
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT name, gender, probability FROM genders WHERE fetched_at >= ? AND name IN ({placeholders})",
+                [float("-inf") if expired else time.time() - self.ttl, *names]).fetchall()
+
+        return {name: {"gender": gender, "probability": probability} for name, gender, probability in rows}
+
+    def put_many(self, results):
+        """
+        Stores results in the cache.
+
+        :param results: Dictionary mapping normalized names to their result.
+        """
+        now = time.time()
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO genders (name, gender, probability, fetched_at) VALUES (?, ?, ?, ?)",
+                [(name, result["gender"], result["probability"], now) for name, result in results.items()])
+            self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+class GenderEnricher:
+    """Predicts the gender of authors, going to genderize only for names missing from the cache."""
+
+    def __init__(self, cache=None, batch_size=const.GENDER_BATCH_SIZE):
+        """
+        :param cache: The GenderCache to use, a default one is opened if not given.
+        :param batch_size: The number of names sent in a single genderize request.
+        """
+        self.cache = cache if cache is not None else GenderCache()
+        self.batch_size = batch_size
+        self.client = Genderize()
+
+    def lookup(self, names, fetch=True):
+        """
+        Predicts the gender of several first names.
+
+        Names missing from the cache are sent to genderize in batches. The results of every batch are cached
+        as they come, so a lookup that failed picks up where it stopped when it is made again.
+
+        :param names: The normalized names to look up.
+        :param fetch: Flag to determine whether names missing from the cache are sent to genderize. Expired
+                      results of the cache are used when not.
+        :return: Dictionary mapping each name to a dictionary with its gender and probability.
+        :raises GenderLookupError: If genderize failed, for example because the rate limit is reached.
+        """
+        names = {name for name in names if name}
+        # Without genderize, an expired result is better than none, e.g. when replaying the extraction
+        results = self.cache.get_many(names, expired=not fetch)
+
+        missing = sorted(names - results.keys()) if fetch else []
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            try:
+                with RECORDER.timer("genderize"):
+                    response = self.client.get(batch)
+                fetched = {name: {"gender": result["gender"], "probability": result["probability"]}
+                           for name, result in zip(batch, response)}
+            except Exception as e:
+                raise GenderLookupError(f"Gender lookup of {len(missing) - start} names failed: {e}") from e
+
+            self.cache.put_many(fetched)
+            results.update(fetched)
+
+        return results
+
+    def enrich(self, records, fetch=True):
+        """
+        Fills in the gender of every author of several articles with a single lookup.
+
+        :param records: The dictionaries returned by Journal.get_details, updated in place.
+        :param fetch: Flag to determine whether names missing from the cache are sent to genderize.
+        :return: The same records.
+        :raises GenderLookupError: If genderize failed, the records are then left as they were.
+        """
+        authors = [author for record in records for author in record.get("Authors", [])]
+        results = self.lookup((normalize_name(author.get("Name")) for author in authors), fetch)
+
+        for author in authors:
+            result = results.get(normalize_name(author.get("Name")))
+            if result is not None:
+                author["Gender"] = result["gender"]
+                author["Gender probability"] = result["probability"]
+
+        return records
+
+    def close(self):
+        self.cache.close()
@@ -0,0 +1,150 @@
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Frames of these libraries are skipped when looking for the code that issued a call, the rate controller included
+LIBRARY_PATHS = (os.sep + "selenium" + os.sep, os.sep + "undetected_chromedriver" + os.sep, __file__,
+                 contextlib.__file__, os.path.join(os.path.dirname(__file__), "throttle.py"))
+
+
+def caller():
+    """
+    Returns the name of the function that issued a call, the first one up the stack from the function calling
+    this one that is not part of WebDriver, of the rate controller or of this module, nor a lambda.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        # Requests are passed to the rate controller as lambdas, the function that made the lambda issued the call
+        if frame.f_code.co_name != "<lambda>" and \
+                not any(path in frame.f_code.co_filename for path in LIBRARY_PATHS):
+            return frame.f_code.co_name
+        frame = frame.f_back
+
+    return "?"
+
+
+class Recorder:
+    """
+    Records the count and duration of the calls made during a crawl, by kind of call, calling function and phase.
+
+    The kinds are the WebDriver commands, e.g. findElement or get, and the timed operations such as genderize and
+    download. Phases, e.g. login or article, are nested per thread.
+    """
+
+    def __init__(self, enabled=False, trace=False):
+        """
+        :param enabled: Flag to determine whether calls are recorded.
+        :param trace: Flag to determine whether every call is kept to be saved as a trace, not only the totals.
+        """
+        self.enabled = enabled
+        self.trace = trace
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.start = time.perf_counter()
+        # Dictionary mapping (kind, caller, phase) to [count, total duration, max duration]
+        self.stats = {}
+        self.events = []
+
+    def current_phase(self):
+        """Returns the innermost phase of the calling thread."""
+        phases = getattr(self.local, "phases", None)
+
+        return phases[-1] if phases else "-"
+
+    def record(self, kind, name, started, duration):
+        """
+        Records a call.
+
+        :param kind: The kind of call.
+        :param name: The name of the calling function.
+        :param started: The perf_counter value when the call started.
+        :param duration: The duration of the call, in seconds.
+        """
+        phase = self.current_phase()
+        with self.lock:
+            stats = self.stats.setdefault((kind, name, phase), [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] = max(stats[2], duration)
+
+            if self.trace:
+                self.events.append({"name": kind, "cat": phase, "ph": "X", "pid": os.getpid(),
+                                    "tid": threading.get_ident(), "ts": (started - self.start) * 1e6,
+                                    "dur": duration * 1e6, "args": {"caller": name}})
+
+    @contextmanager
+    def timer(self, kind, name=None):
+        """
+        Times the calls made inside the context.
+
+        :param kind: The kind of call.
+        :param name: The name of the calling function, found from the stack if not given.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        name = name or caller()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(kind, name, started, time.perf_counter() - started)
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Tags the calls made inside the context with a crawl phase, and times the phase itself.
+
+        :param name: The name of the phase, e.g. login, issue listing, article or image.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        if not hasattr(self.local, "phases"):
+            self.local.phases = []
+
+        started = time.perf_counter()
+        self.local.phases.append(name)
+        try:
+            yield
+        finally:
+            self.local.phases.pop()
+            self.record("phase " + name, name, started, time.perf_counter() - started)
+
+    def report(self):
+        """
+        Returns a table of the recorded calls, the most time consuming first.
+
+        :return: The report as a string.
+        """
+        with self.lock:
+            rows = sorted(self.stats.items(), key=lambda item: item[1][1], reverse=True)
+
+        lines = [f"{'kind':28} {'caller':28} {'phase':16} {'count':>8} {'total':>10} {'mean':>10} {'max':>10}"]
+        for (kind, name, phase), (count, total, longest) in rows:
+            lines.append(f"{kind:28} {name:28} {phase:16} {count:8d} {total:9.2f}s "
+                         f"{total / count * 1000:8.1f}ms {longest * 1000:8.1f}ms")
+
+        return "\n".join(lines)
+
+    def save_trace(self, path):
+        """
+        Saves the recorded calls in the Trace Event format, viewable in chrome://tracing or Perfetto.
+
+        :param path: The path of the trace file.
+        """
+        with self.lock:
+            events = list(self.events)
+
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+# Recorder shared by the whole crawl, disabled until a run enables it
+RECORDER = Recorder()
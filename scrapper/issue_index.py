@@ -0,0 +1,108 @@
+import json
+import os
+import time
+
+import scrapper.constants as const
+from scrapper import crawl, extraction
+from scrapper.instrumentation import RECORDER
+
+
+def filter_years(issues, first_year=None, last_year=None):
+    """
+    Keeps the issues published within a range of years.
+
+    :param issues: List of (year, issue URL) tuples.
+    :param first_year: The first year to keep, None for no lower bound.
+    :param last_year: The last year to keep, None for no upper bound.
+    :return: The issues within the range, in the same order.
+    """
+    return [(year, issue) for year, issue in issues
+            if (first_year is None or int(year) >= first_year) and (last_year is None or int(year) <= last_year)]
+
+
+class IssueIndex:
+    """
+    On-disk index of the issues of every year, so a run can start scraping articles without browsing the
+    "All Issues" section again while the index is fresh.
+    """
+
+    def __init__(self, path=const.ISSUE_INDEX_PATH, ttl=const.ISSUE_INDEX_TTL):
+        """
+        :param path: The path of the JSON file holding the index.
+        :param ttl: The number of seconds after which the index is built again.
+        """
+        self.path = path
+        self.ttl = ttl
+
+    def load(self):
+        """
+        Returns the index stored on disk if it has not expired.
+
+        :return: List of (year, issue URL) tuples, or None if there is no fresh index.
+        """
+        if not os.path.exists(self.path):
+            return None
+
+        with open(self.path) as f:
+            index = json.load(f)
+
+        if time.time() - index["built_at"] > self.ttl:
+            return None
+
+        return [tuple(issue) for issue in index["issues"]]
+
+    def save(self, issues):
+        """
+        Stores the index on disk.
+
+        :param issues: List of (year, issue URL) tuples.
+        """
+        # Write to a temporary file of this process first so a crash, or another process, never leaves a
+        # truncated index behind
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"built_at": time.time(), "issues": issues}, f, indent=1)
+        os.replace(temp_path, self.path)
+
+    def build(self, bot):
+        """
+        Reads the issues of every year from the "All Issues" section in one pass over the page source.
+
+        If the page does not render the issues of the hidden tabs in its HTML, falls back to clicking through
+        the decades and years.
+
+        :param bot: The Journal, on the first page of the journal.
+        :return: List of (year, issue URL) tuples.
+        """
+        with RECORDER.phase("issue listing"):
+            # Navigate to the section that displays all issues of the journal
+            bot.go_to_all_issues()
+
+            # Wait for the list of issues to be rendered
+            bot.get_decades()
+
+            issues = extraction.parse_issue_index(*bot.get_snapshot("index"))
+
+        # Only the issues of the opened year are rendered, the others are loaded when clicking
+        if len({year for year, _ in issues}) <= 1:
+            issues = crawl.collect_issues(bot)
+
+        return issues
+
+    def get(self, bot, first_year=None, last_year=None, refresh=False):
+        """
+        Returns the issues of the journal, from the index on disk when it is fresh, built otherwise.
+
+        :param bot: The Journal, on the first page of the journal, used when the index has to be built.
+        :param first_year: The first year to keep, None for no lower bound.
+        :param last_year: The last year to keep, None for no upper bound.
+        :param refresh: Flag to determine whether to build the index even if it is fresh.
+        :return: List of (year, issue URL) tuples.
+        """
+        issues = None if refresh else self.load()
+
+        if issues is None:
+            issues = self.build(bot)
+            self.save(issues)
+
+        return filter_years(issues, first_year, last_year)
@@ -0,0 +1,153 @@
+from selenium.common.exceptions import WebDriverException
+
+import scrapper.constants as const
+
+
+class DriverManager:
+    """
+    Keeps a long crawl on a fresh browser: pages are opened in a single working tab, stray tabs are closed, and the
+    browser is restarted with the session of the previous one after a number of pages or once its memory passes a
+    limit, so memory stays flat and pages do not get slower as the crawl goes on.
+
+    The manager stands in for the Journal it drives, every attribute it does not define is the Journal's, so the
+    crawl code uses it like a Journal. Restarts only happen before a page is opened, the crawl carries on with the
+    next page on the new browser.
+    """
+
+    # Whether the lack of psutil was reported, it is only reported once per run
+    psutil_reported = False
+
+    def __init__(self, factory, cookies=None, driver=None, max_pages=const.DRIVER_MAX_PAGES,
+                 max_memory=const.DRIVER_MAX_MEMORY, max_handles=const.DRIVER_MAX_HANDLES,
+                 memory_check_interval=const.DRIVER_MEMORY_CHECK_INTERVAL):
+        """
+        :param factory: Function starting a logged in Journal from the cookies of the session.
+        :param cookies: The cookies of the authenticated session, as returned by WebDriver's get_cookies().
+        :param driver: A logged in Journal to start with, one is started from the cookies if not given.
+        :param max_pages: The number of pages after which the browser is restarted, None for no limit.
+        :param max_memory: The memory, in bytes, past which the browser is restarted, None for no limit.
+        :param max_handles: The number of tabs past which the tabs other than the working one are closed.
+        :param memory_check_interval: The number of pages between two measures of the memory of the browser.
+        """
+        self.factory = factory
+        self.max_pages = max_pages
+        self.max_memory = max_memory
+        self.max_handles = max_handles
+        self.memory_check_interval = memory_check_interval
+        self.restarts = 0
+
+        if driver is None:
+            self.cookies = cookies
+            driver = factory(cookies)
+        else:
+            self.cookies = cookies if cookies is not None else driver.get_cookies()
+        self.adopt(driver)
+
+    def adopt(self, driver):
+        """Starts driving a browser, its current tab becoming the working tab."""
+        self.driver = driver
+        self.tab = driver.current_window_handle
+        self.pages = 0
+
+    def restart(self, reason):
+        """
+        Replaces the browser with a new one logged in with the latest cookies of the session.
+
+        :param reason: Why the browser is restarted, printed.
+        """
+        print(f"Restarting the browser after {self.pages} pages: {reason}")
+
+        # Take the cookies refreshed during the crawl, e.g. Cloudflare's, unless the browser is gone
+        try:
+            self.cookies = self.driver.get_cookies()
+        except WebDriverException:
+            pass
+
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+        self.adopt(self.factory(self.cookies))
+        self.restarts += 1
+
+    def memory(self):
+        """
+        Measures the memory used by the browser.
+
+        With psutil installed, it is the resident memory of the browser and all its processes. Otherwise it is the
+        JavaScript heap of the opened page, as reported by Chrome.
+
+        :return: The number of bytes used.
+        """
+        try:
+            import psutil
+        except ImportError:
+            psutil = None
+
+            # The heap of the page misses the growth of the Chrome processes the limit is meant to catch
+            if not DriverManager.psutil_reported:
+                DriverManager.psutil_reported = True
+                print("psutil is not installed, the browser memory limit only measures the JavaScript heap of the "
+                      "page. Install it with `pip install psutil` to measure all of Chrome's processes")
+
+        browser_pid = getattr(self.driver, "browser_pid", None)
+        if psutil is not None and browser_pid:
+            try:
+                browser = psutil.Process(browser_pid)
+                return sum(process.memory_info().rss for process in [browser, *browser.children(recursive=True)])
+            except psutil.Error:
+                pass
+
+        return self.driver.execute_script("return performance.memory ? performance.memory.usedJSHeapSize : 0")
+
+    def close_extra_tabs(self):
+        """Closes the tabs other than the working one once there are too many of them, and goes back to it."""
+        handles = self.driver.window_handles
+        if len(handles) <= self.max_handles:
+            return
+
+        # The working tab was closed by the caller, keep the current one instead
+        if self.tab not in handles:
+            self.tab = self.driver.current_window_handle
+
+        for handle in handles:
+            if handle != self.tab:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+        self.driver.switch_to.window(self.tab)
+
+    def recycle(self):
+        """Restarts the browser if it opened too many pages or uses too much memory."""
+        if self.max_pages is not None and self.pages >= self.max_pages:
+            self.restart(f"the limit of {self.max_pages} pages is reached")
+        elif self.max_memory is not None and self.pages and self.pages % self.memory_check_interval == 0:
+            memory = self.memory()
+            if memory > self.max_memory:
+                self.restart(f"it uses {memory / 2 ** 20:.0f} MB of memory")
+
+    def open_link(self, url, kind=None):
+        """
+        Opens a page in the working tab, restarting the browser first if it is due.
+
+        A browser that stopped responding is restarted and the page opened again on the new one.
+
+        :param url: The URL to open.
+        :param kind: The kind of page, see Journal.open_link.
+        """
+        try:
+            self.recycle()
+            self.close_extra_tabs()
+            self.driver.open_link(url, kind)
+        except WebDriverException as e:
+            self.restart(f"the browser failed ({e.msg})")
+            self.driver.open_link(url, kind)
+
+        self.pages += 1
+
+    def __getattr__(self, name):
+        # Only called for the attributes the manager does not have, the driver is one of them until it is started
+        if name == "driver":
+            raise AttributeError(name)
+
+        return getattr(self.driver, name)
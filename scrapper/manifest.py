@@ -0,0 +1,64 @@
+import threading
+import time
+
+import scrapper.constants as const
+from scrapper.database import connect
+
+
+class DownloadManifest:
+    """
+    Record of the files already downloaded, with their size, HTTP validators and content hash, so unchanged
+    files are not downloaded again.
+
+    With a BlobStore, the manifest is the index from the URLs to the blobs holding their content.
+    """
+
+    def __init__(self, path=const.MANIFEST_PATH, blobs=None):
+        """
+        :param path: The path of the SQLite database holding the manifest.
+        :param blobs: The BlobStore the files are stored in, None to store them directly at their destination.
+        """
+        self.blobs = blobs
+        # The manifest is shared by the download threads
+        self.lock = threading.Lock()
+        self.connection = connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS downloads ("
+                                "url TEXT PRIMARY KEY, path TEXT, size INTEGER, etag TEXT, last_modified TEXT, "
+                                "sha256 TEXT, downloaded_at REAL)")
+        self.connection.commit()
+
+    def get(self, url):
+        """
+        Returns what is known about the download of a URL.
+
+        :param url: The URL of the file.
+        :return: Dictionary with the path, size, etag, last_modified and sha256 of the file, or None.
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT path, size, etag, last_modified, sha256 FROM downloads "
+                                          "WHERE url = ?", (url,)).fetchone()
+
+        if row is None:
+            return None
+
+        return dict(zip(("path", "size", "etag", "last_modified", "sha256"), row))
+
+    def put(self, url, path, size, etag, last_modified, sha256):
+        """
+        Records a completed download.
+
+        :param url: The URL of the file.
+        :param path: The path the file was saved to, its blob when stored in a BlobStore.
+        :param size: The size of the file, in bytes.
+        :param etag: The ETag header of the response, if any.
+        :param last_modified: The Last-Modified header of the response, if any.
+        :param sha256: The SHA-256 hash of the content of the file.
+        """
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO downloads (url, path, size, etag, last_modified, sha256, downloaded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", (url, path, size, etag, last_modified, sha256, time.time()))
+            self.connection.commit()
+
+    def close(self):
+        self.connection.close()
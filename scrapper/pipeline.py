@@ -0,0 +1,289 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import scrapper.constants as const
+from scrapper import crawl, extraction, file_handling
+from scrapper.checkpoint import fingerprint
+from scrapper.instrumentation import RECORDER
+
+# Put in a queue to tell the workers of the next stage there is nothing left
+STOP = object()
+
+
+class Article:
+    """An article going through the stages of the pipeline."""
+
+    def __init__(self, year, issue_url, url):
+        self.year = year
+        self.issue_url = issue_url
+        self.url = url
+        self.details = None
+
+
+class Pipeline:
+    """
+    Crawl split into stages joined by bounded queues, so the stages waiting on the network overlap with the
+    browsers instead of blocking them:
+
+    issue discovery -> article listing -> detail extraction -> gender enrichment -> image download -> writing
+
+    The browsers only open pages and take snapshots, the parsing, the genderize requests, the downloads and the
+    writes run on other threads meanwhile. A full queue blocks the stage feeding it, which keeps memory bounded.
+    """
+
+    def __init__(self, bots, session, checkpoint, genders, writer, concurrency=None,
+                 queue_size=const.PIPELINE_QUEUE_SIZE, manifest=None):
+        """
+        :param bots: The logged in Journal instances the browser stages share.
+        :param session: The authenticated session used to download the images.
+        :param checkpoint: The Checkpoint of the crawl, issues and articles it records as done are skipped.
+        :param genders: The GenderEnricher predicting the gender of the authors.
+        :param writer: The ResultWriter the details of the articles are written to.
+        :param concurrency: Dictionary mapping a stage to its number of workers, defaults to PIPELINE_CONCURRENCY.
+        :param queue_size: The maximum number of items waiting between two stages.
+        :param manifest: The DownloadManifest of the images, images it records as downloaded are skipped.
+        """
+        self.bots = bots
+        self.session = session
+        self.checkpoint = checkpoint
+        self.genders = genders
+        self.writer = writer
+        self.concurrency = dict(const.PIPELINE_CONCURRENCY, **(concurrency or {}))
+        self.queue_size = queue_size
+        self.manifest = manifest
+        # Number of articles of each issue not written or failed yet
+        self.pending = {}
+        # Issues with an article that failed, to be retried on the next run
+        self.failed = set()
+        # Fingerprint of the articles listed by each issue being scraped
+        self.fingerprints = {}
+
+    async def call(self, executor, function, *args):
+        """Runs a blocking function on an executor."""
+        return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+
+    @staticmethod
+    def in_phase(phase, function, *args):
+        """Calls a function tagged with a crawl phase, on the thread it runs on."""
+        with RECORDER.phase(phase):
+            return function(*args)
+
+    async def with_browser(self, function, *args):
+        """Runs a blocking function with the first idle browser as its first argument."""
+        bot = await self.idle_bots.get()
+        try:
+            return await self.call(self.browser_executor, function, bot, *args)
+        finally:
+            self.idle_bots.put_nowait(bot)
+
+    async def run_stage(self, name, handler, inbox, outbox=None, next_stage=None):
+        """
+        Runs the workers of a stage until the previous stage is done, then tells the next stage it is done.
+
+        :param name: The name of the stage in PIPELINE_CONCURRENCY.
+        :param handler: The coroutine handling an item, putting its results in the outbox.
+        :param inbox: The queue the stage takes its items from.
+        :param outbox: The queue of the next stage.
+        :param next_stage: The name of the next stage.
+        """
+
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is STOP:
+                    break
+                await handler(item)
+
+        await asyncio.gather(*[worker() for _ in range(self.concurrency[name])])
+
+        if outbox is not None:
+            for _ in range(self.concurrency[next_stage]):
+                await outbox.put(STOP)
+
+    async def finish(self, article, error=None):
+        """
+        Records an article as written or failed, and its issue as done once all its articles are.
+
+        :param article: The Article.
+        :param error: The exception that made the article fail, None if it was written.
+        """
+        # The checkpoint is written off the event loop, like every other blocking call
+        if error is None:
+            await self.call(self.io_executor, self.checkpoint.mark_article_done, article.url, article.issue_url,
+                            article.details)
+        else:
+            print(f"Failed to scrape {article.url}: {error}")
+            self.failed.add(article.issue_url)
+            await self.call(self.io_executor, self.checkpoint.mark_article_failed, article.url, article.issue_url,
+                            error)
+
+        self.pending[article.issue_url] -= 1
+        if self.pending[article.issue_url] == 0:
+            await self.finish_issue(article.year, article.issue_url)
+
+    async def finish_issue(self, year, issue_url):
+        """Records an issue as done unless one of its articles has to be retried."""
+        del self.pending[issue_url]
+        issue_fingerprint = self.fingerprints.pop(issue_url, None)
+        if issue_url not in self.failed:
+            await self.call(self.io_executor, self.checkpoint.mark_issue_done, issue_url, year, issue_fingerprint)
+
+    def list_articles(self, bot, issue_url):
+        """Opens an issue and returns its article links, on a browser thread."""
+        with RECORDER.phase("issue listing"):
+            bot.open_link(issue_url, "listing")
+            articles = bot.get_articles()
+
+        # Refresh the session cookies, Cloudflare's __cf_bm cookie expires after 30 minutes
+        bot.get_session(self.session)
+
+        return articles
+
+    def snapshot_article(self, bot, url):
+        """Opens an article and takes a snapshot of it, on a browser thread."""
+        with RECORDER.phase("article"):
+            bot.open_link(url, "article")
+
+            return bot.get_article_snapshot()
+
+    def remaining_articles(self, articles):
+        """Returns the articles not scraped by a previous run, on an I/O thread."""
+        return [article for article in articles or [] if not self.checkpoint.is_article_done(article)]
+
+    def download(self, details, year, image_links):
+        """Downloads the images of an article into its directory, on an I/O thread."""
+        destination = crawl.article_dir(details, year)
+        file_handling.create_dir(destination)
+
+        return file_handling.download_files(image_links, destination, self.session, manifest=self.manifest)
+
+    async def listing(self, issue):
+        year, issue_url = issue
+        try:
+            articles = await self.with_browser(self.list_articles, issue_url)
+        except Exception as e:
+            print(f"Failed to list the articles of {issue_url}: {e}")
+            return
+
+        self.fingerprints[issue_url] = fingerprint(articles)
+        articles = await self.call(self.io_executor, self.remaining_articles, articles)
+        self.pending[issue_url] = len(articles)
+        if not articles:
+            await self.finish_issue(year, issue_url)
+
+        for article_url in articles:
+            await self.articles.put(Article(year, issue_url, article_url))
+
+    async def extracting(self, article):
+        try:
+            html, url = await self.with_browser(self.snapshot_article, article.url)
+            # Parse off the browser thread, the browser moves on to the next article meanwhile
+            article.details = await self.call(self.io_executor, self.in_phase, "article", extraction.parse_details,
+                                              html, url)
+        except Exception as e:
+            await self.finish(article, e)
+            return
+
+        await self.extracted.put(article)
+
+    async def enriching(self, article):
+        # Take the other articles already waiting, to predict their genders with as few requests as possible
+        batch = [article]
+        while len(batch) < const.GENDER_BATCH_SIZE and not self.extracted.empty():
+            item = self.extracted.get_nowait()
+            if item is STOP:
+                # Let another worker of this stage see it
+                self.extracted.put_nowait(STOP)
+                break
+            batch.append(item)
+
+        try:
+            await self.call(self.io_executor, self.in_phase, "gender", self.genders.enrich,
+                            [item.details for item in batch])
+        except Exception as e:
+            # The articles of the batch are retried on the next run, the crawl carries on
+            for item in batch:
+                await self.finish(item, e)
+            return
+
+        for item in batch:
+            await self.enriched.put(item)
+
+    async def downloading(self, article):
+        image_links = [image["Link"] for image in article.details["Images"] if image["Link"]]
+
+        if image_links:
+            try:
+                failures = await self.call(self.io_executor, self.in_phase, "image", self.download, article.details,
+                                           article.year, image_links)
+            except Exception as e:
+                # E.g. a title the directory of the article cannot be named after
+                await self.finish(article, e)
+                return
+
+            if failures:
+                await self.finish(article, RuntimeError(f"{len(failures)} image(s) could not be downloaded"))
+                return
+
+        await self.downloaded.put(article)
+
+    async def writing(self, article):
+        try:
+            await self.call(self.io_executor, self.writer.write, article.details)
+        except Exception as e:
+            await self.finish(article, e)
+            return
+
+        await self.finish(article)
+
+    async def run_async(self, issues):
+        """
+        Scrapes the issues through the stages of the pipeline.
+
+        :param issues: List of (year, issue URL) tuples, as returned by crawl.collect_issues.
+        """
+        # Browsers are driven from their own threads, the other blocking calls from a separate pool
+        self.browser_executor = ThreadPoolExecutor(max_workers=len(self.bots), thread_name_prefix="browser")
+        self.io_executor = ThreadPoolExecutor(
+            max_workers=self.concurrency["extraction"] + self.concurrency["enrichment"] +
+            self.concurrency["download"] + self.concurrency["writing"], thread_name_prefix="io")
+
+        self.idle_bots = asyncio.Queue()
+        for bot in self.bots:
+            self.idle_bots.put_nowait(bot)
+
+        self.issues = asyncio.Queue(self.queue_size)
+        self.articles = asyncio.Queue(self.queue_size)
+        self.extracted = asyncio.Queue(self.queue_size)
+        self.enriched = asyncio.Queue(self.queue_size)
+        self.downloaded = asyncio.Queue(self.queue_size)
+
+        async def discovery():
+            for issue in issues:
+                # Skip the issues whose articles were all scraped by a previous run
+                if not await self.call(self.io_executor, self.checkpoint.is_issue_done, issue[1]):
+                    await self.issues.put(issue)
+
+            for _ in range(self.concurrency["listing"]):
+                await self.issues.put(STOP)
+
+        try:
+            await asyncio.gather(
+                discovery(),
+                self.run_stage("listing", self.listing, self.issues, self.articles, "extraction"),
+                self.run_stage("extraction", self.extracting, self.articles, self.extracted, "enrichment"),
+                self.run_stage("enrichment", self.enriching, self.extracted, self.enriched, "download"),
+                self.run_stage("download", self.downloading, self.enriched, self.downloaded, "writing"),
+                self.run_stage("writing", self.writing, self.downloaded),
+            )
+        finally:
+            self.browser_executor.shutdown()
+            self.io_executor.shutdown()
+
+    def run(self, issues):
+        """
+        Scrapes the issues through the stages of the pipeline and waits for all of them to be done.
+
+        :param issues: List of (year, issue URL) tuples, as returned by crawl.collect_issues.
+        """
+        asyncio.run(self.run_async(issues))
@@ -0,0 +1,164 @@
+import queue
+import threading
+
+import scrapper.constants as const
+from scrapper import crawl
+from scrapper.lifecycle import DriverManager
+from scrapper.scrapper import Journal
+
+
+# undetected_chromedriver patches the driver executable when starting, so browsers are started one at a time
+start_lock = threading.Lock()
+
+
+def start_browser(cookies, genders=None, headless=True, archive=None):
+    """
+    Starts a browser sharing the cookies of an authenticated session.
+
+    :param cookies: The cookies of the authenticated session, as returned by WebDriver's get_cookies().
+    :param genders: The GenderEnricher of the browser.
+    :param headless: Flag to determine whether the browser runs without a window.
+    :param archive: The PageArchive the pages are saved to, if any.
+    :return: The Journal.
+    """
+    with start_lock:
+        bot = Journal(headless=headless, genders=genders, archive=archive)
+
+    bot.load_cookies(cookies)
+
+    return bot
+
+
+class IssuePool:
+    """
+    Scrapes issues in parallel with several headless Journal workers sharing the cookies of an authenticated session.
+
+    Every worker runs its own Chrome on its own thread and pulls issues from a shared queue. A worker that fails
+    restarts its browser and puts the issue back in the queue, until the issue has been attempted too many times.
+    The results of all the workers go to the same checkpoint and result store.
+    """
+
+    def __init__(self, cookies, checkpoint, genders, writer, workers=const.WORKERS, headless=True,
+                 max_attempts=const.ISSUE_ATTEMPTS, manifest=None, archive=None):
+        """
+        :param cookies: The cookies of the authenticated session, as returned by WebDriver's get_cookies().
+        :param checkpoint: The Checkpoint of the crawl, issues it records as done are skipped.
+        :param genders: The GenderEnricher predicting the gender of the authors.
+        :param writer: The ResultWriter the details of the articles are written to.
+        :param workers: The number of browsers scraping in parallel.
+        :param headless: Flag to determine whether the browsers run without a window.
+        :param max_attempts: The number of times an issue is attempted before giving up on it for this run.
+        :param manifest: The DownloadManifest of the images, images it records as downloaded are skipped.
+        :param archive: The PageArchive the pages are saved to, if any.
+        """
+        self.cookies = cookies
+        self.checkpoint = checkpoint
+        self.genders = genders
+        self.writer = writer
+        self.workers = workers
+        self.headless = headless
+        self.max_attempts = max_attempts
+        self.manifest = manifest
+        self.archive = archive
+        self.issues = queue.Queue()
+        # Number of issues queued or being scraped, workers wait for it to drop to zero as failed issues are requeued
+        self.pending = 0
+        self.pending_lock = threading.Lock()
+        # Set when the crawl is interrupted, workers then stop after their current issue
+        self.stopping = threading.Event()
+
+    def put(self, year, issue_url, attempts):
+        """Queues an issue."""
+        with self.pending_lock:
+            self.pending += 1
+        self.issues.put((year, issue_url, attempts))
+
+    def start_worker(self):
+        """
+        Starts a browser and gives it the authenticated session.
+
+        :return: Tuple of the Journal and its download session.
+        """
+        # Restart the browser every so often so it does not slow down over a long crawl
+        bot = DriverManager(lambda cookies: start_browser(cookies, self.genders, self.headless, self.archive),
+                            self.cookies)
+
+        return bot, bot.get_session()
+
+    def stop_worker(self, bot, session):
+        """Closes the browser and the download session of a worker, ignoring a browser that already crashed."""
+        if session is not None:
+            session.close()
+        if bot is not None:
+            try:
+                bot.quit()
+            except Exception:
+                pass
+
+    def work(self, index):
+        """
+        Pulls issues from the queue and scrapes them until no issue is left.
+
+        :param index: The index of the worker, used in the log messages.
+        """
+        bot, session = None, None
+
+        while not self.stopping.is_set():
+            try:
+                year, issue_url, attempts = self.issues.get(timeout=1)
+            except queue.Empty:
+                # Stop once no other worker may requeue an issue
+                with self.pending_lock:
+                    if self.pending == 0:
+                        break
+                continue
+
+            try:
+                # Start the browser on the first issue, and again after a failure
+                if bot is None:
+                    bot, session = self.start_worker()
+
+                crawl.scrape_issue(bot, year, issue_url, session, self.checkpoint, self.genders, self.writer,
+                                   self.manifest)
+            except Exception as e:
+                print(f"Worker {index} failed on {issue_url}: {e}")
+
+                # Restart the browser, it may have crashed or be stuck on a broken page
+                self.stop_worker(bot, session)
+                bot, session = None, None
+
+                # Give the issue another chance, possibly on another worker
+                if attempts + 1 < self.max_attempts:
+                    self.put(year, issue_url, attempts + 1)
+
+            with self.pending_lock:
+                self.pending -= 1
+
+        self.stop_worker(bot, session)
+
+    def run(self, issues):
+        """
+        Scrapes the issues and waits for all of them to be done.
+
+        :param issues: List of (year, issue URL) tuples, as returned by crawl.collect_issues.
+        """
+        for year, issue_url in issues:
+            # Skip the issues whose articles were all scraped by a previous run
+            if not self.checkpoint.is_issue_done(issue_url):
+                self.put(year, issue_url, 0)
+
+        threads = [threading.Thread(target=self.work, args=(index,), name=f"worker-{index}")
+                   for index in range(min(self.workers, self.issues.qsize()))]
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            for thread in threads:
+                thread.join()
+        except BaseException:
+            # Interrupted, e.g. by Ctrl+C: let the workers finish their issue and quit their browsers
+            self.stopping.set()
+            for thread in threads:
+                thread.join()
+            raise
@@ -0,0 +1,181 @@
+import re
+
+from scrapper.checkpoint import normalize_doi
+
+# Columns of each relation of the output with their type, "text", "integer" or "real". Every relation is keyed by
+# the DOI of the article, the authors, figures and tables by their position in the article as well, from 1
+RELATIONS = {
+    "articles": [("doi", "text"), ("doi_link", "text"), ("title", "text"), ("publication_date", "text"),
+                 ("authors", "integer"), ("images", "integer"), ("tables", "integer")],
+    "authors": [("doi", "text"), ("position", "integer"), ("name", "text"), ("affiliations", "text"),
+                ("gender", "text"), ("gender_probability", "real")],
+    "figures": [("doi", "text"), ("position", "integer"), ("caption", "text"), ("link", "text")],
+    "tables": [("doi", "text"), ("position", "integer"), ("caption", "text")],
+}
+
+# Separator of the affiliations of an author in the authors relation
+AFFILIATION_SEPARATOR = "; "
+
+
+def columns(relation):
+    """Returns the names of the columns of a relation."""
+    return [column for column, _ in RELATIONS[relation]]
+
+
+def article_key(record):
+    """
+    Returns the key of an article in the relations.
+
+    :param record: The dictionary returned by Journal.get_details.
+    :return: The bare DOI of the article, or its title if it has no DOI.
+    """
+    return normalize_doi(record.get("Paper DOI")) or record.get("Paper title")
+
+
+def normalize(record):
+    """
+    Splits the details of an article into the rows of the relations.
+
+    :param record: The dictionary returned by Journal.get_details.
+    :return: Dictionary mapping each relation to its rows, as dictionaries.
+    """
+    doi = article_key(record)
+    authors = record.get("Authors", [])
+    images = record.get("Images", [])
+    tables = record.get("Tables", [])
+
+    return {
+        "articles": [{"doi": doi, "doi_link": record.get("Paper DOI"), "title": record.get("Paper title"),
+                      "publication_date": record.get("Publication Date"), "authors": len(authors),
+                      "images": len(images), "tables": len(tables)}],
+        "authors": [{"doi": doi, "position": position, "name": author.get("Name"),
+                     "affiliations": AFFILIATION_SEPARATOR.join(author.get("Affiliations", [])) or None,
+                     "gender": author.get("Gender"), "gender_probability": author.get("Gender probability")}
+                    for position, author in enumerate(authors, 1)],
+        "figures": [{"doi": doi, "position": position, "caption": image.get("Caption"), "link": image.get("Link")}
+                    for position, image in enumerate(images, 1)],
+        "tables": [{"doi": doi, "position": position, "caption": table.get("Caption")}
+                   for position, table in enumerate(tables, 1)],
+    }
+
+
+def assemble(articles, authors, figures, tables):
+    """
+    Joins the rows of the relations back into the details of the articles.
+
+    An article written several times to an append-only store appears once, with its latest rows.
+
+    :param articles: Iterable of the rows of the articles relation, in the order they were written.
+    :param authors: Iterable of the rows of the authors relation.
+    :param figures: Iterable of the rows of the figures relation.
+    :param tables: Iterable of the rows of the tables relation.
+    :return: Iterator of dictionaries as returned by Journal.get_details, ordered by their latest write.
+    """
+    # Rows of each article by position, a later row replacing an earlier one
+    children = {}
+    for relation, rows in (("authors", authors), ("figures", figures), ("tables", tables)):
+        for row in rows:
+            children.setdefault((relation, row["doi"]), {})[row["position"]] = row
+
+    latest = {}
+    for row in articles:
+        latest.pop(row["doi"], None)
+        latest[row["doi"]] = row
+
+    def rows_of(relation, doi, count):
+        # Positions beyond the latest count belong to an older version of the article
+        positions = children.get((relation, doi), {})
+        return [positions[position] for position in range(1, (count or 0) + 1) if position in positions]
+
+    for doi, row in latest.items():
+        record = {"Paper title": row["title"], "Paper DOI": row["doi_link"],
+                  "Publication Date": row["publication_date"]}
+
+        record["Authors"] = []
+        for author_row in rows_of("authors", doi, row["authors"]):
+            author = {"Name": author_row["name"],
+                      "Affiliations": author_row["affiliations"].split(AFFILIATION_SEPARATOR)
+                      if author_row["affiliations"] else []}
+            if author_row["gender"] is not None or author_row["gender_probability"] is not None:
+                author["Gender"] = author_row["gender"]
+                author["Gender probability"] = author_row["gender_probability"]
+            record["Authors"].append(author)
+
+        record["Images"] = [{"Caption": image_row["caption"], "Link": image_row["link"]}
+                            for image_row in rows_of("figures", doi, row["images"])]
+        record["Tables"] = [{"Caption": table_row["caption"]} for table_row in rows_of("tables", doi, row["tables"])]
+
+        yield record
+
+
+def from_wide(record):
+    """
+    Converts a record of the former wide output, with numbered image and table columns, to the current details.
+
+    The wide output only kept the first and last author, so the other authors are missing.
+
+    :param record: The wide record, as stored by runs before the relational output.
+    :return: Dictionary as returned by Journal.get_details.
+    """
+    if "Authors" in record:
+        return record
+
+    authors = []
+    for name_field, affiliation_field, gender_field, probability_field in (
+            ("Name of the first author", "Affiliation of the first author", "Gender of the first author",
+             "First author gender probability"),
+            ("Name of the last author", "Affiliation of the last author", "Gender of the last author",
+             "Last author gender probability")):
+        if record.get(name_field):
+            author = {"Name": record[name_field],
+                      "Affiliations": [record[affiliation_field]] if record.get(affiliation_field) else []}
+            if gender_field in record:
+                author["Gender"] = record[gender_field]
+                author["Gender probability"] = record.get(probability_field)
+            authors.append(author)
+
+    images = sorted((int(match.group(1)), key) for key in record
+                    for match in [re.match(r"^Image (\d+) Link$", key)] if match)
+    tables = sorted((int(match.group(1)), key) for key in record
+                    for match in [re.match(r"^Table (\d+) caption$", key)] if match)
+
+    return {
+        "Paper title": record.get("Paper title"),
+        "Paper DOI": record.get("Paper DOI"),
+        "Publication Date": record.get("Publication Date"),
+        "Authors": authors,
+        "Images": [{"Caption": record.get(f"Image {i} caption"), "Link": record[key]} for i, key in images],
+        "Tables": [{"Caption": record[key]} for _, key in tables],
+    }
+
+
+def summary(record):
+    """
+    Returns the row of an article in the summary sheet of the Excel output, with its first and last author.
+
+    :param record: The dictionary returned by Journal.get_details.
+    :return: Dictionary keyed by the columns of const.COLUMNS.
+    """
+    authors = record.get("Authors", [])
+
+    row = {
+        "Paper title": record.get("Paper title"),
+        "Paper DOI": record.get("Paper DOI"),
+        "Publication Date": record.get("Publication Date"),
+        "Number of authors": len(authors),
+        "Number of Images": len(record.get("Images", [])),
+        "Number of Tables": len(record.get("Tables", [])),
+    }
+
+    # The last author is only shown for articles with more than one author
+    shown = [("first", authors[0])] if authors else []
+    if len(authors) > 1:
+        shown.append(("last", authors[-1]))
+
+    for which, author in shown:
+        row[f"Name of the {which} author"] = author.get("Name")
+        row[f"Affiliation of the {which} author"] = AFFILIATION_SEPARATOR.join(author.get("Affiliations", [])) or None
+        row[f"Gender of the {which} author"] = author.get("Gender")
+        row[f"{which.capitalize()} author gender probability"] = author.get("Gender probability")
+
+    return row
@@ -1,9 +1,12 @@
 # Import necessary libraries and modules
-import time
+from urllib.parse import urlparse
 
 import pandas as pd
 import scrapper.constants as const
-from genderize import Genderize
+from scrapper import extraction, file_handling, schema
+from scrapper.gender import GenderEnricher
+from scrapper.instrumentation import RECORDER, caller
+from scrapper.throttle import CHALLENGE_TITLES, RATE_CONTROLLER
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
@@ -16,36 +19,85 @@ from undetected_chromedriver import ChromeOptions
 
 # Define the Journal class that inherits from Chrome
 class Journal(Chrome):
-    def __init__(self, teardown=False, headless=True):
+    def __init__(self, teardown=False, headless=True, genders=None, snapshot=True, profile_dir=None,
+                 block_resources=const.BLOCK_RESOURCES, resource_policies=None,
+                 page_load_strategy=const.PAGE_LOAD_STRATEGY, archive=None):
         # Constructor docstring
         """
         Constructor for the Journal class. It initializes the base class and sets the implicit wait time.
 
         :param teardown: Flag to determine whether to shut down the driver after usage.
+        :param headless: Flag to determine whether to run Chrome without a window.
+        :param genders: The GenderEnricher used to predict the gender of authors, created lazily if not given.
+        :param snapshot: Flag to determine whether pages are extracted from a single snapshot of their HTML
+            instead of one WebDriver round trip per element.
+        :param profile_dir: The Chrome profile directory to use, keeping the login across runs. A profile can only
+            be opened by one browser at a time, other browsers share the session through a SessionStore.
+        :param block_resources: Flag to determine whether open_link blocks the resources of the policy of the page.
+        :param resource_policies: Dictionary mapping a kind of page to the resources blocked on it, defaults to
+            RESOURCE_POLICIES.
+        :param page_load_strategy: When the browser hands a page over, "eager" or "normal".
+        :param archive: The PageArchive the snapshots of the pages are saved to, if any.
         """
 
+        # Set the extraction mode
+        self.snapshot = snapshot
+
+        # Set the gender enrichment layer, shared with other instances when given
+        self.genders = genders
+
+        # Set the archive of the pages, shared with other instances when given
+        self.archive = archive
+
+        # Set the resources blocked on each kind of page, and the kind of page they are currently blocked for
+        self.block_resources = block_resources
+        self.resource_policies = resource_policies if resource_policies is not None else const.RESOURCE_POLICIES
+        self.resource_policy = None
+
         # Initialize ChromeOptions and set to headless mode
         self.options = ChromeOptions()
         self.options.headless = headless
 
+        # Get pages back as soon as their HTML is parsed, without waiting for the resources they load
+        self.options.page_load_strategy = page_load_strategy
+
         # Set the teardown flag
         self.teardown = teardown
         # Initialize the super class (Chrome) with options
         super(Journal, self).__init__(options=self.options, use_subprocess=True,
-                                      driver_executable_path="chromedriver.exe")
+                                      driver_executable_path="chromedriver.exe", user_data_dir=profile_dir)
         # Set an implicit wait time for 5 seconds
         self.implicitly_wait(1)
 
+    def execute(self, driver_command, params=None):
+        """
+        Sends a command to the browser, timing it when the instrumentation is enabled.
+
+        Every WebDriver call, including those made on elements, goes through this method.
+        """
+        if not RECORDER.enabled:
+            return super(Journal, self).execute(driver_command, params)
+
+        with RECORDER.timer(driver_command, caller()):
+            return super(Journal, self).execute(driver_command, params)
+
     def login(self):
-        # Open the login page using the constant path.
-        self.open_link(const.LOGIN_PATH)
+        # Wait up to 15 seconds for each step of the login flow instead of sleeping a fixed time
+        wait = WebDriverWait(self, 15)
+
+        # Open the login page using the constant path, loading every resource.
+        self.open_link(const.LOGIN_PATH, "login")
+
+        # The institution search is set up by scripts that may still be running with the eager page load strategy
+        with RECORDER.timer("wait"):
+            wait.until(lambda driver: driver.execute_script("return document.readyState") == "complete")
 
         # Accept cookies if prompted.
         self.accept_cookies()
 
         # Type in the name of the institution in the input box.
         self.find_element(By.CSS_SELECTOR, "input[class='form-control js--autocomplete-element']").send_keys(
-            "Bar-Ilan University")
+            const.INSTITUTION)
 
         # Create an action chain to simulate keypress.
         action = ActionChains(self)
@@ -59,10 +111,9 @@ class Journal(Chrome):
         # Click on another element - possibly a confirmation or next step button.
         self.find_element(By.CSS_SELECTOR, "div[class='ORRU02D-k-a']").click()
 
-        time.sleep(2)
-
-        self.find_element(By.CSS_SELECTOR, "#i0116").send_keys(
-            const.EMAIL + Keys.ENTER)
+        # Wait for the email input of the identity provider.
+        with RECORDER.timer("wait"):
+            wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "#i0116"))).send_keys(const.EMAIL + Keys.ENTER)
 
         try:
             self.find_element(By.CSS_SELECTOR,
@@ -70,23 +121,75 @@ class Journal(Chrome):
         except:
             pass
 
-        time.sleep(2)
-
-        self.find_element(By.CSS_SELECTOR, "#i0118").send_keys(
-            const.PASSWORD + Keys.ENTER)
+        # Wait for the password input.
+        with RECORDER.timer("wait"):
+            wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "#i0118"))).send_keys(
+                const.PASSWORD + Keys.ENTER)
 
         self.find_element(By.CSS_SELECTOR,
                           "#idDiv_SAOTCS_Proofs > div:nth-child(1) > div > div > div.table-cell.text-left.content").click()
 
-        # Print a message to console notifying about a 60-second waiting period.
-        print("Waiting 60 seconds for code verification")
+        # Print a message to console notifying about the code verification.
+        print(f"Waiting up to {const.LOGIN_TIMEOUT} seconds for code verification")
+
+        # Wait for the identity provider to redirect back to the journal once the code is verified.
+        with RECORDER.timer("wait"):
+            WebDriverWait(self, const.LOGIN_TIMEOUT).until(
+                lambda driver: urlparse(driver.current_url).netloc == urlparse(const.BASE_URL).netloc)
 
-        # Pause the execution for 60 seconds to allow the login process to complete.
-        time.sleep(60)
+    def is_logged_in(self):
+        """
+        Checks whether the browser is logged in, i.e. the journal shows the institution providing the access.
+
+        :return: True if the browser is logged in.
+        """
+        self.land_first_page()
+
+        return const.INSTITUTION in self.page_source
+
+    def ensure_login(self, store):
+        """
+        Logs in by reusing the saved session if it is still valid, and goes through the login flow otherwise.
+
+        :param store: The SessionStore the session is loaded from and saved to.
+        """
+
+        # Reuse the saved cookies, or the Chrome profile, if the site still accepts them
+        cookies = store.load()
+        if cookies:
+            self.load_cookies(cookies)
+        if self.is_logged_in():
+            return
+
+        # The session expired, log in again and save the new session
+        store.clear()
+        self.login()
+        self.land_first_page()
+        store.save(self.get_cookies())
 
     def land_first_page(self):
         """Navigates the driver to the base URL specified in constants."""
-        self.get(const.BASE_URL)
+        self.open_link(const.BASE_URL, "listing")
+
+    def load_cookies(self, cookies):
+        """
+        Gives the browser the cookies of another, authenticated, browser so it can skip the login.
+
+        :param cookies: The cookies, as returned by WebDriver's get_cookies().
+        """
+
+        # Cookies can only be set for the domain of the opened page
+        self.land_first_page()
+
+        for cookie in cookies:
+            try:
+                self.add_cookie(cookie)
+            except Exception:
+                # Cookies of other domains, e.g. set during the institutional login, are rejected
+                pass
+
+        # Reload the page with the cookies
+        self.refresh()
 
     def accept_cookies(self):
         """Tries to locate and click the "Accept Cookies" button if present."""
@@ -160,12 +263,41 @@ class Journal(Chrome):
 
         return issues
 
+    def get_snapshot(self, kind=None):
+        """
+        Takes a snapshot of the currently opened page, to be parsed by scrapper.extraction on any thread.
+
+        :param kind: The kind of page, "index", "issue" or "article", under which the snapshot is archived. Pages
+            without a kind are not archived.
+        :return: Tuple of the HTML and the URL of the page.
+        """
+        html, url = self.page_source, self.current_url
+
+        if self.archive is not None and kind is not None:
+            self.archive.put(url, kind, html)
+
+        return html, url
+
+    def get_article_snapshot(self):
+        """
+        Waits for the currently opened article to be rendered and takes a snapshot of it.
+
+        :return: Tuple of the HTML and the URL of the page.
+        """
+        self.find_element(By.CSS_SELECTOR, "h1[property='name']")
+
+        return self.get_snapshot("article")
+
     def get_articles(self):
         """
         Attempts to get article links from the "Regular Articles" section.
         If not found, it continues to subsequent sections until an h4 tag is encountered.
         """
 
+        # Parse the links out of a snapshot of the page instead of walking the sections one round trip at a time
+        if self.snapshot:
+            return extraction.parse_articles(*self.get_snapshot("issue"))
+
         # Fetch the "Regular Articles" section and collect subsequent sections until an h4 tag is found
         try:
             regular_articles_section = self.find_element(By.XPATH, "//section[h4[text()='Regular Articles']]")
@@ -200,11 +332,100 @@ class Journal(Chrome):
             # print("No Regular Article on this page")
             pass
 
-    def open_link(self, url):
-        """Navigates the browser to the provided URL."""
-        self.get(url)
+    def set_resource_policy(self, kind):
+        """
+        Blocks the resources of the policy of a kind of page for the next pages opened.
+
+        :param kind: The kind of page in the resource policies, "login", "listing" or "article". Kinds without a
+            policy load every resource.
+        """
+        if kind == self.resource_policy:
+            return
+
+        policy = self.resource_policies.get(kind, {})
+        patterns = [pattern for resource_type in policy.get("types", [])
+                    for pattern in const.RESOURCE_PATTERNS[resource_type]] + policy.get("patterns", [])
+
+        # The blocked URLs only apply once the network domain is enabled
+        if self.resource_policy is None:
+            self.execute_cdp_cmd("Network.enable", {})
+        self.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+
+        self.resource_policy = kind
+
+    def open_link(self, url, kind=None):
+        """
+        Navigates the browser to the provided URL.
+
+        :param url: The URL to open.
+        :param kind: The kind of page, "login", "listing" or "article", selecting the resources blocked while it
+            loads. None loads every resource.
+        """
+        if self.block_resources:
+            self.set_resource_policy(kind)
+
+        # Open the page at the pace the host tolerates, backing off while Cloudflare challenges the browser
+        RATE_CONTROLLER.call(url, lambda: self.get(url), lambda _: self.is_challenged())
+
+    def is_challenged(self):
+        """
+        Checks whether Cloudflare shows its challenge instead of the opened page.
 
-    def get_details(self):
+        :return: True if the browser is being challenged.
+        """
+        return self.title in CHALLENGE_TITLES
+
+    def get_session(self, session=None):
+        """
+        Shares the browser's cookies with a pooled HTTP session for downloading files.
+
+        :param session: An existing session to refresh with the current cookies, if any.
+        :return: The requests.Session carrying the browser's cookies.
+        """
+        if session is None:
+            user_agent = self.execute_script("return navigator.userAgent")
+            return file_handling.create_session(self.get_cookies(), user_agent)
+
+        file_handling.update_cookies(session, self.get_cookies())
+
+        return session
+
+    def get_details(self, enrich_gender=True):
+        """
+        Extracts the details of the currently opened article.
+
+        :param enrich_gender: Flag to determine whether to predict the gender of the authors right away.
+            When False, the gender fields are left out so a GenderEnricher can fill them in a deferred batch.
+        :return: Dictionary with the details of the article.
+        """
+
+        if self.snapshot:
+            # Parse all the details out of a snapshot of the page
+            details = extraction.parse_details(*self.get_article_snapshot())
+        else:
+            # Archive the page even though it is not parsed from its snapshot
+            if self.archive is not None:
+                self.get_article_snapshot()
+            details = self.extract_details()
+
+        # Predicting the gender of the authors using their first names
+        if enrich_gender:
+            if self.genders is None:
+                self.genders = GenderEnricher()
+            self.genders.enrich([details])
+
+        # Printing the 'details' dictionary
+        print(details)
+
+        # Returning the 'details' dictionary
+        return details
+
+    def extract_details(self):
+        """
+        Extracts the details of the currently opened article element by element through WebDriver.
+
+        :return: Dictionary with the details of the article, without the gender of the authors.
+        """
 
         # Initializing an empty dictionary to store the details
         details = {}
@@ -223,16 +444,6 @@ class Journal(Chrome):
         # Extracting all authors
         authors = self.find_elements(By.CSS_SELECTOR, "span[property='author']")
 
-        # Calculating the total number of authors
-        number_of_authors = len(authors)
-
-        # Extracting the name of the first author
-        first_author_name = authors[0].find_element(By.CSS_SELECTOR, "span[property='givenName']").text + " " + authors[
-            0].find_element(By.CSS_SELECTOR, "span[property='familyName']").text
-
-        # Predicting the gender of the first author using their name
-        first_author_gender = Genderize().get1(first_author_name.split()[0])
-
         # Extracting affiliations
         affiliations = self.find_elements(By.CSS_SELECTOR, "div[property='affiliation']")
 
@@ -254,84 +465,47 @@ class Journal(Chrome):
         details["Paper title"] = article_name
         details["Paper DOI"] = doi
         details["Publication Date"] = publish_date
-        details["Number of authors"] = number_of_authors
-        details["Name of the first author"] = first_author_name
-        details["Gender of the first author"] = first_author_gender["gender"]
-        details["First author gender probability"] = first_author_gender["probability"]
-
-        # Extracting affiliation of the first author using JavaScript execution
-        first_affiliation = affiliations[0].find_element(By.CSS_SELECTOR, "span[property='name']")
-        details["Affiliation of the first author"] = self.execute_script("return arguments[0].textContent",
-                                                                         first_affiliation)
-
-        # Checking if there's more than one author and then extracting details of the last author
-        if number_of_authors > 1:
-            last_author_name = authors[-1].find_element(By.CSS_SELECTOR, "span[property='givenName']").text + " " + \
-                               authors[-1].find_element(By.CSS_SELECTOR, "span[property='familyName']").text
-            last_author_gender = Genderize().get1(last_author_name.split()[0])
-            details["Name of the last author"] = last_author_name
-            details["Gender of the last author"] = last_author_gender["gender"]
-            details["Last author gender probability"] = last_author_gender["probability"]
-
-            # Extracting affiliation of the last author using JavaScript execution
-            last_affiliation = affiliations[-1].find_element(By.CSS_SELECTOR, "span[property='name']")
-            details["Affiliation of the last author"] = self.execute_script("return arguments[0].textContent",
-                                                                            last_affiliation)
-
-        # Storing the number of images
-        details["Number of Images"] = len(images)
 
-        # Extracting caption and link for each image in the first half
-        for i in range(img_half_length):
-            details[f"Image {i + 1} caption"] = images[i].find_element(By.CSS_SELECTOR, "figcaption").text
-            details[f"Image {i + 1} Link"] = images[i].find_element(By.CSS_SELECTOR, "img").get_attribute("src")
+        # Check once whether the affiliations are nested in the elements of the authors, without waiting for them
+        # since most pages have none
+        self.implicitly_wait(0)
+        try:
+            nested = bool(self.find_elements(By.CSS_SELECTOR, "span[property='author'] [property='affiliation']"))
+        finally:
+            self.implicitly_wait(1)
+
+        # Extracting every author with their affiliations, the affiliations nested in the element of an author are
+        # theirs, otherwise the page lists one affiliation per author in the same order
+        details["Authors"] = []
+        for i, author in enumerate(authors):
+            name = author.find_element(By.CSS_SELECTOR, "span[property='givenName']").text + " " + \
+                   author.find_element(By.CSS_SELECTOR, "span[property='familyName']").text
+
+            if nested:
+                author_affiliations = author.find_elements(By.CSS_SELECTOR, "[property='affiliation']")
+            else:
+                index = extraction.affiliation_index(i, len(authors), len(affiliations))
+                author_affiliations = [affiliations[index]] if index is not None else []
+
+            # Extracting the raw text of the affiliations using JavaScript execution
+            details["Authors"].append({"Name": name, "Affiliations": [
+                self.execute_script("return arguments[0].textContent",
+                                    affiliation.find_element(By.CSS_SELECTOR, "span[property='name']"))
+                for affiliation in author_affiliations]})
 
-        # Storing the number of tables
-        details["Number of Tables"] = len(tables)
+        # Extracting caption and link for each image in the first half
+        details["Images"] = [{"Caption": image.find_element(By.CSS_SELECTOR, "figcaption").text,
+                              "Link": image.find_element(By.CSS_SELECTOR, "img").get_attribute("src")}
+                             for image in images]
 
         # Extracting caption for each table in the first half
-        for i in range(tab_half_length):
-            details[f"Table {i + 1} caption"] = tables[i].find_element(By.CSS_SELECTOR, "figcaption").text
+        details["Tables"] = [{"Caption": table.find_element(By.CSS_SELECTOR, "figcaption").text} for table in tables]
 
-        # Printing the 'details' dictionary
-        print(details)
-
-        # Returning the 'details' dictionary
         return details
 
     def create_dataframe(self):
-        # Define the column names in a list
-        columns = [
-            "Paper title",
-            "Paper DOI",
-            "Publication Date",
-            "Number of authors",
-            "Name of the first author",
-            "Name of the last author",
-            "Gender of the first author",
-            "Gender of the last author",
-            "First author gender probability",
-            "Last author gender probability",
-            "Affiliation of the first author",
-            "Affiliation of the last author",
-            "Number of Images"
-        ]
-
-        # Add image caption and link columns
-        for i in range(1, 11):
-            columns.append(f"Image {i} caption")
-
-        for i in range(1, 11):
-            columns.append(f"Image {i} Link")
-
-        columns.append("Number of Tables")
-
-        # Add table caption columns
-        for i in range(1, 11):
-            columns.append(f"Table {i} caption")
-
         # Create an empty DataFrame with the columns
-        df = pd.DataFrame(columns=columns)
+        df = pd.DataFrame(columns=const.COLUMNS)
 
         return df
 
@@ -345,7 +519,7 @@ class Journal(Chrome):
         :return: The updated DataFrame with appended data.
         """
 
-        # Using the 'loc' accessor to add a new row to the end of the DataFrame
-        df.loc[len(df)] = data
+        # Using the 'loc' accessor to add the summary row of the article to the end of the DataFrame
+        df.loc[len(df)] = schema.summary(data)
 
         return df
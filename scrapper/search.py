@@ -0,0 +1,248 @@
+import re
+import sqlite3
+import threading
+
+import scrapper.constants as const
+from scrapper import schema
+from scrapper.database import connect
+from scrapper.writers import ResultWriter
+
+# Fields of an article indexed for full-text search, each a row of the index with its position in the article
+FIELDS = ("title", "figure", "table", "author", "affiliation")
+# Fields searched by a full-text query when none are given
+TEXT_FIELDS = ("title", "figure", "table")
+
+
+def publication_year(date):
+    """
+    Returns the year of a publication date as shown on the article page, e.g. "First published March 3, 2020".
+
+    :return: The year, None if the date has none.
+    """
+    match = re.search(r"\b(1[89]\d\d|2\d\d\d)\b", date or "")
+
+    return int(match.group(1)) if match else None
+
+
+def quote(text):
+    """Turns text into a full-text query matching every one of its words, whatever characters it contains."""
+    return " ".join('"{}"'.format(word.replace('"', '""')) for word in text.split())
+
+
+class SearchIndex:
+    """
+    Inverted index over the scraped articles, answering full-text searches over the titles and the captions of the
+    figures and tables, and lookups by author, affiliation, year and gender, without loading the result store.
+
+    The index is a SQLite database: an FTS5 table holds the text of every title, caption, author name and
+    affiliation, and ordinary tables with B-tree indexes hold the year of the articles and the gender of their
+    authors. An article added again replaces its previous entries, so the index can be kept up to date as the
+    articles are written.
+    """
+
+    def __init__(self, path=const.SEARCH_INDEX_PATH):
+        """
+        :param path: The path of the SQLite database holding the index.
+        """
+        self.path = path
+        # The index is shared by the scraping threads
+        self.lock = threading.Lock()
+        self.connection = connect(path)
+        self.connection.executescript(
+            "CREATE TABLE IF NOT EXISTS articles (doi TEXT PRIMARY KEY, title TEXT, year INTEGER);"
+            "CREATE INDEX IF NOT EXISTS articles_year ON articles (year);"
+            "CREATE TABLE IF NOT EXISTS authors (doi TEXT, position INTEGER, last INTEGER, gender TEXT, "
+            "PRIMARY KEY (doi, position));"
+            "CREATE INDEX IF NOT EXISTS authors_gender ON authors (gender, doi);"
+            # The text of the documents is in the FTS5 table, their article and field in this one, sharing its rowid
+            "CREATE TABLE IF NOT EXISTS documents (id INTEGER PRIMARY KEY, doi TEXT, field TEXT, position INTEGER);"
+            "CREATE INDEX IF NOT EXISTS documents_doi ON documents (doi);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS texts USING fts5("
+            "text, tokenize='porter unicode61 remove_diacritics 2');")
+        self.connection.commit()
+
+    def remove(self, doi):
+        """Removes the entries of an article, in the current transaction."""
+        self.connection.execute("DELETE FROM texts WHERE rowid IN (SELECT id FROM documents WHERE doi = ?)", (doi,))
+        self.connection.execute("DELETE FROM documents WHERE doi = ?", (doi,))
+        self.connection.execute("DELETE FROM authors WHERE doi = ?", (doi,))
+        self.connection.execute("DELETE FROM articles WHERE doi = ?", (doi,))
+
+    def insert(self, record):
+        """Adds the entries of an article, in the current transaction."""
+        doi = schema.article_key(record)
+        authors = record.get("Authors", [])
+
+        self.connection.execute("INSERT INTO articles (doi, title, year) VALUES (?, ?, ?)",
+                                (doi, record.get("Paper title"), publication_year(record.get("Publication Date"))))
+        self.connection.executemany("INSERT INTO authors (doi, position, last, gender) VALUES (?, ?, ?, ?)",
+                                    [(doi, position, position == len(authors), author.get("Gender"))
+                                     for position, author in enumerate(authors, 1)])
+
+        documents = [("title", 1, record.get("Paper title"))]
+        documents += [("figure", position, image.get("Caption"))
+                      for position, image in enumerate(record.get("Images", []), 1)]
+        documents += [("table", position, table.get("Caption"))
+                      for position, table in enumerate(record.get("Tables", []), 1)]
+        for position, author in enumerate(authors, 1):
+            documents.append(("author", position, author.get("Name")))
+            documents += [("affiliation", position, affiliation) for affiliation in author.get("Affiliations", [])]
+
+        for field, position, text in documents:
+            if text:
+                rowid = self.connection.execute("INSERT INTO documents (doi, field, position) VALUES (?, ?, ?)",
+                                                (doi, field, position)).lastrowid
+                self.connection.execute("INSERT INTO texts (rowid, text) VALUES (?, ?)", (rowid, text))
+
+    def add(self, record):
+        """
+        Indexes an article, replacing its previous entries.
+
+        :param record: The dictionary returned by Journal.get_details.
+        """
+        self.add_many([record])
+
+    def add_many(self, records):
+        """
+        Indexes several articles in one transaction, replacing their previous entries.
+
+        :param records: The dictionaries returned by Journal.get_details.
+        """
+        with self.lock, self.connection:
+            for record in records:
+                self.remove(schema.article_key(record))
+                self.insert(record)
+
+    def rebuild(self, store, batch_size=const.SEARCH_BATCH_SIZE):
+        """
+        Indexes the articles of a result store again from scratch.
+
+        :param store: The ResultWriter to read the articles from.
+        :param batch_size: The number of articles indexed per transaction.
+        :return: The number of articles indexed.
+        """
+        with self.lock, self.connection:
+            for table in ("texts", "documents", "authors", "articles"):
+                self.connection.execute(f"DELETE FROM {table}")
+
+        count = 0
+        batch = []
+        for record in store.read():
+            batch.append(record)
+            if len(batch) == batch_size:
+                self.add_many(batch)
+                count += len(batch)
+                batch = []
+        self.add_many(batch)
+        count += len(batch)
+
+        # Merge the segments of the full-text index written by the batches, for faster queries
+        with self.lock, self.connection:
+            self.connection.execute("INSERT INTO texts (texts) VALUES ('optimize')")
+
+        return count
+
+    def search(self, text=None, fields=TEXT_FIELDS, author=None, affiliation=None, year=None, gender=None,
+               author_position=None, limit=const.SEARCH_LIMIT):
+        """
+        Searches the index. The criteria given are all met by the results.
+
+        :param text: Full-text query in the FTS5 syntax, e.g. 'fmri OR "eye tracking"', words are matched on their
+                     stem and regardless of case and accents. A query that is not valid FTS5 matches its words.
+        :param fields: The fields the text is searched in, among FIELDS.
+        :param author: Words of the name of one of the authors.
+        :param affiliation: Words of the affiliation of one of the authors.
+        :param year: The year of publication, or a tuple of the first and last years.
+        :param gender: The gender of one of the authors, "male" or "female".
+        :param author_position: Which author the gender is the one of, "first" or "last", any of them if not given.
+        :param limit: The maximum number of results.
+        :return: List of dictionaries with the "doi", "title" and "year" of the articles found, and for a full-text
+                 search the "field" and "position" of the text of the article matching best and a "snippet" of it,
+                 best matches first.
+        """
+        conditions, parameters = [], []
+
+        if year is not None:
+            first_year, last_year = year if isinstance(year, (tuple, list)) else (year, year)
+            conditions.append("article.year BETWEEN ? AND ?")
+            parameters += [first_year, last_year]
+
+        for field, words in (("author", author), ("affiliation", affiliation)):
+            if words:
+                conditions.append("article.doi IN (SELECT doi FROM documents JOIN texts ON texts.rowid = documents.id "
+                                  "WHERE texts MATCH ? AND documents.field = ?)")
+                parameters += [quote(words), field]
+
+        if gender is not None:
+            position = {"first": " AND position = 1", "last": " AND last", None: ""}[author_position]
+            conditions.append(f"article.doi IN (SELECT doi FROM authors WHERE gender = ?{position})")
+            parameters.append(gender)
+
+        where = "".join(f" AND {condition}" for condition in conditions)
+
+        if not text:
+            query = (f"SELECT doi, title, year FROM articles AS article WHERE 1{where} "
+                     "ORDER BY year, title LIMIT ?")
+            with self.lock:
+                rows = self.connection.execute(query, parameters + [limit]).fetchall()
+            return [{"doi": doi, "title": title, "year": year} for doi, title, year in rows]
+
+        fields = list(fields)
+        # An article is found once, by the text of it matching best. Snippets cannot be taken along with a window
+        # function, so they are taken for the best matches once they are known
+        query = ("WITH best AS (SELECT id, score FROM ("
+                 "SELECT document.id, texts.rank AS score, "
+                 "ROW_NUMBER() OVER (PARTITION BY document.doi ORDER BY texts.rank) AS match FROM texts "
+                 "JOIN documents AS document ON document.id = texts.rowid "
+                 "JOIN articles AS article ON article.doi = document.doi "
+                 f"WHERE texts MATCH ? AND document.field IN ({', '.join('?' * len(fields))}){where}) "
+                 "WHERE match = 1 ORDER BY score LIMIT ?) "
+                 "SELECT article.doi, article.title, article.year, document.field, document.position, "
+                 "snippet(texts, 0, '[', ']', '...', 16) FROM texts "
+                 "JOIN best ON best.id = texts.rowid "
+                 "JOIN documents AS document ON document.id = texts.rowid "
+                 "JOIN articles AS article ON article.doi = document.doi "
+                 "WHERE texts MATCH ? ORDER BY best.score")
+
+        with self.lock:
+            try:
+                rows = self.connection.execute(query, [text, *fields, *parameters, limit, text]).fetchall()
+            except sqlite3.OperationalError:
+                # Not a valid FTS5 query, e.g. a word with a hyphen, match its words instead
+                rows = self.connection.execute(query, [quote(text), *fields, *parameters, limit,
+                                                       quote(text)]).fetchall()
+
+        return [{"doi": doi, "title": title, "year": year, "field": field, "position": position, "snippet": snippet}
+                for doi, title, year, field, position, snippet in rows]
+
+    def close(self):
+        self.connection.close()
+
+
+class IndexingWriter(ResultWriter):
+    """Result store that adds the articles written to it to a SearchIndex, keeping the index up to date."""
+
+    def __init__(self, writer, index):
+        """
+        :param writer: The ResultWriter the articles are written to.
+        :param index: The SearchIndex the articles are added to.
+        """
+        super().__init__(writer.path)
+        self.writer = writer
+        self.index = index
+
+    def write(self, record):
+        self.writer.write(record)
+        self.index.add(record)
+
+    def write_many(self, records):
+        records = list(records)
+        self.writer.write_many(records)
+        self.index.add_many(records)
+
+    def read(self):
+        return self.writer.read()
+
+    def close(self):
+        self.writer.close()
+        self.index.close()
@@ -0,0 +1,59 @@
+import json
+import os
+import threading
+import time
+
+import scrapper.constants as const
+
+
+class SessionStore:
+    """
+    Cookies of an authenticated browser saved on disk, so later runs and other browsers can skip the login.
+    """
+
+    def __init__(self, path=const.SESSION_PATH):
+        """
+        :param path: The path of the JSON file holding the cookies.
+        """
+        self.path = path
+        # The store is shared by the workers of a pool
+        self.lock = threading.Lock()
+
+    def load(self):
+        """
+        Returns the saved cookies that have not expired yet.
+
+        :return: List of cookies as returned by WebDriver's get_cookies(), or None if there is no saved session.
+        """
+        with self.lock:
+            if not os.path.exists(self.path):
+                return None
+
+            with open(self.path) as f:
+                cookies = json.load(f)
+
+        # Session cookies have no expiry, they last as long as the saved session
+        now = time.time()
+        cookies = [cookie for cookie in cookies if cookie.get("expiry", now + 1) > now]
+
+        return cookies or None
+
+    def save(self, cookies):
+        """
+        Saves the cookies of a browser.
+
+        :param cookies: The cookies, as returned by WebDriver's get_cookies().
+        """
+        with self.lock:
+            # Write to a temporary file of this process first so a crash, or another process, never leaves a
+            # truncated session behind
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(cookies, f)
+            os.replace(temp_path, self.path)
+
+    def clear(self):
+        """Forgets the saved session, e.g. once it has been rejected by the site."""
+        with self.lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
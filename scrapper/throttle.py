@@ -0,0 +1,227 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import scrapper.constants as const
+
+# Status codes of a server asking to slow down or failing under load, the request is retried later
+THROTTLE_STATUSES = (429, 500, 502, 503, 504)
+
+# Titles of the pages Cloudflare shows instead of the requested page while it checks the browser
+CHALLENGE_TITLES = ("Just a moment...", "Attention Required! | Cloudflare", "Please Wait... | Cloudflare")
+
+
+class Throttled(Exception):
+    """Raised when a request is still throttled, or challenged, after all its attempts."""
+
+
+def retry_after(response):
+    """
+    Returns the delay a throttled response asks for.
+
+    :param response: The requests.Response.
+    :return: The number of seconds to wait from its Retry-After header, at most RATE_BACKOFF_MAX so a broken header
+        cannot hold a worker for hours, None if it has none.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+
+    # The header is either a number of seconds or an HTTP date
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+
+    return min(const.RATE_BACKOFF_MAX, max(0.0, delay))
+
+
+def throttled_response(response):
+    """
+    Tells whether a response of requests asks to slow down, closing it if so.
+
+    :param response: The requests.Response.
+    :return: False if the response can be used, otherwise True or the number of seconds to wait.
+    """
+    if response.status_code not in THROTTLE_STATUSES:
+        return False
+
+    delay = retry_after(response)
+    response.close()
+
+    return True if delay is None else delay
+
+
+class HostLimiter:
+    """
+    Pace of the requests to one host: a token bucket refilled at the current rate, and a limit on the requests in
+    flight.
+
+    Both follow additive increase, multiplicative decrease: every request answered in time raises them a little,
+    an error, a throttled response or a slow answer cuts them, so they settle just below the pace the site tolerates.
+    """
+
+    def __init__(self, rate=const.RATE_INITIAL, concurrency=const.CONCURRENCY_INITIAL):
+        """
+        :param rate: The initial number of requests per second.
+        :param concurrency: The initial number of requests in flight.
+        """
+        self.condition = threading.Condition()
+        self.rate = rate
+        self.tokens = const.RATE_BURST
+        self.refilled_at = time.monotonic()
+        # Fractional so the limit grows by one once a full window of requests succeeded
+        self.window = float(concurrency)
+        self.active = 0
+        # No request starts before this time, set when the server asks to retry later
+        self.paused_until = 0.0
+        # Time of the last decrease, the requests in flight when it happened do not decrease again
+        self.decreased_at = 0.0
+
+    def refill(self, now):
+        self.tokens = min(const.RATE_BURST, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+
+    def acquire(self):
+        """Waits until a request to the host may start."""
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                self.refill(now)
+
+                if now < self.paused_until:
+                    timeout = self.paused_until - now
+                elif self.active >= int(self.window):
+                    # Woken up by the end of a request
+                    timeout = None
+                elif self.tokens < 1:
+                    timeout = (1 - self.tokens) / self.rate
+                else:
+                    self.tokens -= 1
+                    self.active += 1
+                    return
+
+                self.condition.wait(timeout)
+
+    def release(self, latency, throttled=False, delay=None):
+        """
+        Ends a request and adapts the pace to how it went.
+
+        :param latency: The number of seconds the request took.
+        :param throttled: Flag telling whether the request failed, was throttled or was challenged.
+        :param delay: The number of seconds the server asked to wait before the next request, if any.
+        """
+        with self.condition:
+            self.active -= 1
+            now = time.monotonic()
+
+            if throttled or latency > const.RATE_LATENCY_TARGET:
+                if now - self.decreased_at > const.RATE_COOLDOWN:
+                    self.rate = max(const.RATE_MIN, self.rate * const.RATE_DECREASE)
+                    self.window = max(1.0, self.window * const.RATE_DECREASE)
+                    self.decreased_at = now
+                if delay:
+                    self.paused_until = max(self.paused_until, now + delay)
+            else:
+                self.rate = min(const.RATE_MAX, self.rate + const.RATE_INCREASE)
+                self.window = min(const.CONCURRENCY_MAX, self.window + 1 / int(self.window))
+
+            self.condition.notify_all()
+
+
+class RateController:
+    """
+    Paces the requests of the browsers and of the downloads, host by host, and retries the requests that were
+    throttled with a jittered exponential backoff.
+
+    A single controller, RATE_CONTROLLER, is shared by every thread so all the requests to a host count together.
+    """
+
+    def __init__(self, enabled=const.THROTTLE, retries=const.RATE_RETRIES):
+        """
+        :param enabled: Flag to determine whether requests are paced, they are still retried when disabled.
+        :param retries: The number of times a throttled request is retried.
+        """
+        self.enabled = enabled
+        self.retries = retries
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    def host(self, url):
+        """Returns the HostLimiter of the host of a URL."""
+        host = urlparse(url).netloc
+
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = HostLimiter()
+
+            return self.hosts[host]
+
+    def backoff(self, attempt):
+        """
+        Returns the number of seconds to wait before retrying, random so the retries of parallel workers spread out.
+
+        :param attempt: The number of attempts made so far.
+        """
+        delay = min(const.RATE_BACKOFF_MAX, const.RATE_BACKOFF * 2 ** (attempt - 1))
+
+        return random.uniform(delay / 2, delay)
+
+    def call(self, url, function, throttled=None):
+        """
+        Makes a request once the host allows it, and retries it while it is throttled.
+
+        :param url: The URL requested, its host sets the pace.
+        :param function: The function making the request, without arguments.
+        :param throttled: Function telling from the result whether the request was throttled, returning False, True
+            or the number of seconds the server asked to wait.
+        :return: The result of the function.
+        :raises Throttled: If the request is still throttled after all its attempts.
+        """
+        limiter = self.host(url)
+
+        for attempt in range(1, self.retries + 2):
+            if self.enabled:
+                limiter.acquire()
+            start = time.monotonic()
+
+            try:
+                result = function()
+                verdict = throttled(result) if throttled is not None else False
+            except Exception:
+                # Errors are not retried here, they only slow the host down
+                if self.enabled:
+                    limiter.release(time.monotonic() - start, throttled=True)
+                raise
+
+            # The number of seconds the server asked to wait, if it did
+            delay = None if verdict is True or verdict is False else verdict
+
+            if self.enabled:
+                limiter.release(time.monotonic() - start, throttled=verdict is not False, delay=delay)
+
+            if verdict is False:
+                return result
+
+            if attempt <= self.retries:
+                time.sleep(delay if delay else self.backoff(attempt))
+
+        raise Throttled(f"{url} is still throttled after {self.retries + 1} attempts")
+
+    def report(self):
+        """
+        Summarizes the pace each host settled at.
+
+        :return: The summary, one line per host.
+        """
+        return "\n".join(f"{host}: {limiter.rate:.2f} requests/s, {int(limiter.window)} in flight"
+                         for host, limiter in self.hosts.items())
+
+
+# Controller shared by the browsers and the downloads
+RATE_CONTROLLER = RateController()
@@ -0,0 +1,199 @@
+import os
+import time
+
+import requests
+
+import scrapper.constants as const
+from scrapper import extraction, file_handling
+from scrapper.checkpoint import fingerprint
+from scrapper.issue_index import filter_years
+from scrapper.throttle import CHALLENGE_TITLES, RATE_CONTROLLER, Throttled, throttled_response
+
+
+class WatchLock:
+    """
+    Lock file keeping two watches from running at once, e.g. when cron starts one while the previous one is still
+    scraping.
+    """
+
+    def __init__(self, path=const.WATCH_LOCK_PATH, ttl=const.WATCH_LOCK_TTL):
+        """
+        :param path: The path of the lock file.
+        :param ttl: The number of seconds after which a lock is considered left behind by a crashed watch.
+        """
+        self.path = path
+        self.ttl = ttl
+
+    def acquire(self):
+        """
+        Takes the lock.
+
+        :return: True if the lock was taken, False if another watch holds it.
+        """
+        # A lock older than its time to live was left behind by a watch that did not release it
+        if os.path.exists(self.path) and time.time() - os.path.getmtime(self.path) > self.ttl:
+            os.remove(self.path)
+
+        try:
+            descriptor = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+
+        with os.fdopen(descriptor, "w") as f:
+            f.write(str(os.getpid()))
+
+        return True
+
+    def release(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class PageFetcher:
+    """
+    Fetches listing pages over plain HTTP with the cookies of the saved session, so a watch can tell whether there is
+    anything to scrape without starting a browser.
+    """
+
+    def __init__(self, cookies=None, user_agent=const.WATCH_USER_AGENT):
+        """
+        :param cookies: The cookies of the saved session, as returned by WebDriver's get_cookies(), if any.
+        :param user_agent: The User-Agent the pages are requested with.
+        """
+        self.session = file_handling.create_session(cookies or [], user_agent)
+
+    def fetch(self, url):
+        """
+        Fetches a page at the pace the host tolerates.
+
+        :param url: The URL of the page.
+        :return: The HTML of the page, or None if the site did not serve it, e.g. because Cloudflare challenged the
+            request.
+        """
+        try:
+            response = RATE_CONTROLLER.call(url, lambda: self.session.get(url, timeout=const.WATCH_TIMEOUT),
+                                            throttled_response)
+        except (Throttled, requests.RequestException) as e:
+            print(f"Could not fetch {url}: {e}")
+            return None
+
+        if response.status_code != 200:
+            return None
+
+        title = extraction.parse_page(response.text, url).findtext(".//title")
+        if title is not None and title.strip() in CHALLENGE_TITLES:
+            return None
+
+        return response.text
+
+    def close(self):
+        self.session.close()
+
+
+class BrowserFetcher:
+    """Fetches issue pages with a logged in Journal, when the site does not serve them over plain HTTP."""
+
+    def __init__(self, bot):
+        """
+        :param bot: The Journal used to open the pages.
+        """
+        self.bot = bot
+
+    def fetch(self, url):
+        """
+        Opens a page and takes a snapshot of it.
+
+        :param url: The URL of the page.
+        :return: The HTML of the page.
+        """
+        self.bot.open_link(url, "listing")
+
+        return self.bot.get_snapshot("issue")[0]
+
+
+def list_issues(fetcher):
+    """
+    Reads the issues of the journal from its "All Issues" page, found from the first page of the journal.
+
+    :param fetcher: The PageFetcher used to fetch the pages.
+    :return: List of (year, issue URL) tuples, or None if the pages were not served.
+    """
+    html = fetcher.fetch(const.BASE_URL)
+    if html is None:
+        return None
+
+    links = extraction.parse_page(html, const.BASE_URL).xpath("//a[@data-id='all-issues']/@href")
+    if not links:
+        return None
+
+    html = fetcher.fetch(links[0])
+    if html is None:
+        return None
+
+    return extraction.parse_issue_index(html, links[0]) or None
+
+
+def watched_issues(issues, checkpoint, first_year=None, last_year=None, recent_years=const.WATCH_RECENT_YEARS):
+    """
+    Keeps the issues that may have articles left to scrape: those not finished yet, whatever their year, those of the
+    recent years, which may still gain articles, and the issues of const.WATCH_ISSUES, e.g. the Online First issue.
+
+    :param issues: List of (year, issue URL) tuples of the journal.
+    :param checkpoint: The Checkpoint of the previous runs.
+    :param first_year: The first year to keep, None for no lower bound.
+    :param last_year: The last year to keep, None for no upper bound.
+    :param recent_years: The number of years, counting the current one, whose finished issues are checked again.
+    :return: List of (year, issue URL) tuples.
+    """
+    first_recent_year = time.localtime().tm_year - recent_years + 1
+
+    watched = [(year, issue_url) for year, issue_url in filter_years(issues, first_year, last_year)
+               if int(year) >= first_recent_year or not checkpoint.is_issue_done(issue_url)]
+
+    # The issues listed apart, under a year of their own
+    watched += [("Online First", issue_url) for issue_url in const.WATCH_ISSUES
+                if issue_url not in {issue for _, issue in watched}]
+
+    return watched
+
+
+def changed_issues(fetcher, issues, checkpoint):
+    """
+    Finds the issues with articles that have not been scraped yet, by comparing the articles they list with those
+    they listed when they were finished, and reopens them in the checkpoint so the crawl scrapes them again. Only
+    their new articles are scraped, the others are done.
+
+    :param fetcher: The PageFetcher or BrowserFetcher used to fetch the issues.
+    :param issues: List of (year, issue URL) tuples to check.
+    :param checkpoint: The Checkpoint of the previous runs.
+    :return: Tuple of the list of the (year, issue URL) tuples to scrape, and of the list of the finished issues the
+        fetcher could not fetch, to be checked again with a browser.
+    """
+    changed, unchecked = [], []
+
+    for year, issue_url in issues:
+        # Issues never finished are scraped anyway
+        if not checkpoint.is_issue_done(issue_url):
+            changed.append((year, issue_url))
+            continue
+
+        html = fetcher.fetch(issue_url)
+        if html is None:
+            # The issue stays done until a browser has compared its articles
+            unchecked.append((year, issue_url))
+            continue
+
+        articles = extraction.parse_articles(html, issue_url)
+        issue_fingerprint = fingerprint(articles)
+        if issue_fingerprint == checkpoint.issue_fingerprint(issue_url):
+            continue
+
+        # The issue was finished without a fingerprint, or lost articles, but all of its articles are scraped
+        if all(checkpoint.is_article_done(article) for article in articles or []):
+            checkpoint.mark_issue_done(issue_url, year, issue_fingerprint)
+            continue
+
+        checkpoint.reopen_issue(issue_url)
+        changed.append((year, issue_url))
+
+    return changed, unchecked
@@ -0,0 +1,384 @@
+import atexit
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+import scrapper.constants as const
+from scrapper import schema
+from scrapper.database import connect
+
+
+class ResultWriter(ABC):
+    """
+    Append-only store the details of the articles are streamed to as they are scraped.
+
+    Records are flushed to disk on every write, so memory stays flat and a crash loses nothing
+    that was written. Opening an existing store appends to it.
+
+    The records are stored as the articles, authors, figures and tables relations of scrapper.schema,
+    keyed by DOI, except by the JSON Lines backend which keeps them whole.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: The path of the store.
+        """
+        self.path = path
+        # Writers are shared by the scraping threads
+        self.lock = threading.Lock()
+
+    @abstractmethod
+    def write(self, record):
+        """
+        Appends a record to the store.
+
+        :param record: The dictionary returned by Journal.get_details.
+        """
+
+    def write_many(self, records):
+        """
+        Appends several records to the store, in one go where the backend allows it.
+
+        :param records: The dictionaries returned by Journal.get_details.
+        """
+        for record in records:
+            self.write(record)
+
+    @abstractmethod
+    def read(self):
+        """
+        Iterates over the records of the store, in the order they were written.
+
+        :return: Iterator of dictionaries as returned by Journal.get_details.
+        """
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CSVWriter(ResultWriter):
+    """Writes the relations to one CSV file each, in a directory."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        os.makedirs(path, exist_ok=True)
+
+        self.files = {}
+        self.writers = {}
+        for relation in schema.RELATIONS:
+            relation_path = os.path.join(path, f"{relation}.csv")
+            # Only write the header when starting a new file
+            new_file = not os.path.exists(relation_path) or os.path.getsize(relation_path) == 0
+            self.files[relation] = open(relation_path, "a", newline="", encoding="utf-8")
+            self.writers[relation] = csv.DictWriter(self.files[relation], fieldnames=schema.columns(relation))
+            if new_file:
+                self.writers[relation].writeheader()
+                self.files[relation].flush()
+
+    def write(self, record):
+        rows = schema.normalize(record)
+        with self.lock:
+            # Write the article row last, so an article is only read back once all its rows are on disk
+            for relation in reversed(list(schema.RELATIONS)):
+                self.writers[relation].writerows(rows[relation])
+                self.files[relation].flush()
+
+    def read_relation(self, relation):
+        """Iterates over the rows of a relation, with their values converted to the types of the relation."""
+        types = dict(schema.RELATIONS[relation])
+        with open(os.path.join(self.path, f"{relation}.csv"), newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                # Empty cells are missing values
+                yield {column: None if value == "" else int(value) if types[column] == "integer" else
+                       float(value) if types[column] == "real" else value for column, value in row.items()}
+
+    def read(self):
+        return schema.assemble(*[self.read_relation(relation) for relation in schema.RELATIONS])
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+
+
+class JSONLinesWriter(ResultWriter):
+    """Writes one JSON object per article and per line, with its authors, figures and tables nested in it."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, record):
+        with self.lock:
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.file.flush()
+
+    def read(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    # Lines written before the relational output have numbered image and table fields
+                    yield schema.from_wide(json.loads(line))
+
+    def close(self):
+        self.file.close()
+
+
+# SQLite type of each type of column of the relations
+SQLITE_TYPES = {"text": "TEXT", "integer": "INTEGER", "real": "REAL"}
+
+
+class SQLiteWriter(ResultWriter):
+    """
+    Writes the relations to SQLite tables, an article written again replaces its previous rows.
+
+    The tables can be queried directly, e.g. the articles of an author:
+    SELECT title FROM articles JOIN authors USING (doi) WHERE name = ?
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.connection = connect(path)
+
+        for relation, relation_columns in schema.RELATIONS.items():
+            key = "doi" if relation == "articles" else "doi, position"
+            definitions = ", ".join(f"{column} {SQLITE_TYPES[column_type]}" for column, column_type in relation_columns)
+            extra = ", written_at REAL" if relation == "articles" else ""
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS {relation} ("
+                                    f"{definitions}{extra}, PRIMARY KEY ({key}))")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS authors_name ON authors (name)")
+        self.connection.commit()
+
+        self.migrate()
+
+    def migrate(self):
+        """Moves the records of the single table written before the relational output into the relations."""
+        if self.connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'records'"
+                                   ).fetchone() is None:
+            return
+
+        self.write_many([schema.from_wide(json.loads(record)) for record, in
+                         self.connection.execute("SELECT record FROM records ORDER BY written_at").fetchall()])
+        self.connection.execute("DROP TABLE records")
+        self.connection.commit()
+
+    def write(self, record):
+        self.write_many([record])
+
+    def write_many(self, records):
+        with self.lock, self.connection:
+            # Replace every row of the articles in a single transaction
+            for record in records:
+                rows = schema.normalize(record)
+                doi = rows["articles"][0]["doi"]
+
+                for relation in schema.RELATIONS:
+                    self.connection.execute(f"DELETE FROM {relation} WHERE doi = ?", (doi,))
+
+                for relation, relation_rows in rows.items():
+                    relation_columns = schema.columns(relation)
+                    if relation == "articles":
+                        relation_columns.append("written_at")
+                        relation_rows = [dict(row, written_at=time.time()) for row in relation_rows]
+                    self.connection.executemany(
+                        f"INSERT INTO {relation} ({', '.join(relation_columns)}) "
+                        f"VALUES ({', '.join('?' * len(relation_columns))})",
+                        [[row[column] for column in relation_columns] for row in relation_rows])
+
+    def read(self):
+        # Read through a connection of our own so writes are not blocked while iterating
+        connection = connect(self.path)
+        connection.row_factory = sqlite3.Row
+        try:
+            relations = [[dict(row) for row in connection.execute(
+                f"SELECT * FROM {relation} ORDER BY {'written_at' if relation == 'articles' else 'doi, position'}")]
+                for relation in schema.RELATIONS]
+        finally:
+            connection.close()
+
+        return schema.assemble(*relations)
+
+    def close(self):
+        self.connection.close()
+
+
+class ParquetWriter(ResultWriter):
+    """
+    Writes the relations to Parquet, buffering them into row groups.
+
+    The path is a directory with a sub-directory per relation, every run adds its own part file to
+    them since Parquet files cannot be appended to once closed. A writer left open is closed when the
+    interpreter exits, so the records it still buffers are written; only a killed process loses them.
+    """
+
+    def __init__(self, path, row_group_size=const.PARQUET_ROW_GROUP_SIZE):
+        """
+        :param path: The directory holding the Parquet part files.
+        :param row_group_size: The number of articles buffered before a row group is written.
+        """
+        super().__init__(path)
+
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("The parquet backend requires pyarrow, install it with `pip install pyarrow`") from e
+
+        self.pa = pa
+        self.pq = pq
+        self.row_group_size = row_group_size
+        arrow_types = {"text": pa.string(), "integer": pa.int64(), "real": pa.float64()}
+        self.schemas = {relation: pa.schema([(column, arrow_types[column_type]) for column, column_type in
+                                             relation_columns])
+                        for relation, relation_columns in schema.RELATIONS.items()}
+        self.buffers = {relation: [] for relation in schema.RELATIONS}
+        self.buffered = 0
+
+        self.part = f"part-{time.time_ns()}.parquet"
+        # Part files are only created once there are rows to write, a store opened to be read is left as is
+        self.writers = {}
+        for relation in schema.RELATIONS:
+            os.makedirs(os.path.join(path, relation), exist_ok=True)
+
+        # Write the buffered rows even if the crawl stops with an exception before closing the writer
+        atexit.register(self.close)
+
+    def write(self, record):
+        rows = schema.normalize(record)
+        with self.lock:
+            for relation, relation_rows in rows.items():
+                self.buffers[relation] += relation_rows
+            self.buffered += 1
+            if self.buffered >= self.row_group_size:
+                self.flush()
+
+    def flush(self):
+        """Writes the buffered rows as a row group of every relation."""
+        for relation, rows in self.buffers.items():
+            if rows:
+                if relation not in self.writers:
+                    self.writers[relation] = self.pq.ParquetWriter(os.path.join(self.path, relation, self.part),
+                                                                   self.schemas[relation])
+                columns = {column: [row[column] for row in rows] for column in schema.columns(relation)}
+                self.writers[relation].write_table(self.pa.table(columns, schema=self.schemas[relation]))
+                self.buffers[relation] = []
+        self.buffered = 0
+
+    def read_relation(self, relation):
+        """Iterates over the rows of a relation, part file after part file."""
+        directory = os.path.join(self.path, relation)
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".parquet"):
+                try:
+                    parquet_file = self.pq.ParquetFile(os.path.join(directory, name))
+                except self.pa.ArrowInvalid:
+                    # Part files still being written by another process have no footer yet
+                    continue
+                for batch in parquet_file.iter_batches():
+                    yield from batch.to_pylist()
+
+    def rotate(self):
+        """
+        Writes the buffered rows and closes the part files, so they can be read, the next rows going to new ones.
+        """
+        self.flush()
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+        self.part = f"part-{time.time_ns()}.parquet"
+
+    def read(self):
+        # Close the part files of this run first so the rows written so far are read back too
+        with self.lock:
+            self.rotate()
+
+        return schema.assemble(*[self.read_relation(relation) for relation in schema.RELATIONS])
+
+    def close(self):
+        with self.lock:
+            self.rotate()
+        atexit.unregister(self.close)
+
+
+# Writer class of each backend
+WRITERS = {
+    "csv": CSVWriter,
+    "jsonl": JSONLinesWriter,
+    "sqlite": SQLiteWriter,
+    "parquet": ParquetWriter,
+}
+
+
+def open_writer(backend=const.OUTPUT_BACKEND, path=None):
+    """
+    Opens the result store of the given backend.
+
+    :param backend: One of "csv", "jsonl", "sqlite" or "parquet".
+    :param path: The path of the store, the default path of the backend if not given.
+    :return: The ResultWriter of the backend.
+    """
+    if backend not in WRITERS:
+        raise ValueError(f"Unknown output backend {backend!r}, expected one of {', '.join(WRITERS)}")
+
+    return WRITERS[backend](path or const.RESULTS_PATHS[backend])
+
+
+def detect_backend(path):
+    """
+    Returns the backend of an existing result store.
+
+    :param path: The path of the store.
+    :return: One of "csv", "jsonl", "sqlite" or "parquet".
+    """
+    if os.path.isdir(path):
+        return "csv" if os.path.exists(os.path.join(path, "articles.csv")) else "parquet"
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".sqlite", ".db"):
+        return "sqlite"
+    if extension in (".jsonl", ".json"):
+        return "jsonl"
+
+    raise ValueError(f"Cannot tell the backend of the result store {path}")
+
+
+def export_excel(writer, out_path=const.OUT_PATH):
+    """
+    Exports the records of a result store to an Excel file in one go.
+
+    The first sheet summarizes the articles with their first and last author, the other sheets hold
+    every author, figure and table of the articles, keyed by DOI. An article written several times,
+    e.g. when a crawl was interrupted before checkpointing it, appears once with its latest details.
+
+    :param writer: The ResultWriter to export.
+    :param out_path: The path of the Excel file.
+    """
+    # Keep the latest version of every article
+    records = {}
+    for record in writer.read():
+        key = schema.article_key(record)
+        records.pop(key, None)
+        records[key] = record
+
+    # Fill any NaN values in the summary with the text "Not Available"
+    articles = pd.DataFrame([schema.summary(record) for record in records.values()], columns=const.COLUMNS)
+    articles = articles.fillna("Not Available")
+
+    # Save the summary and the other relations to the sheets of an Excel file
+    with pd.ExcelWriter(out_path) as excel:
+        articles.to_excel(excel, sheet_name="Articles", index=False)
+        for relation in ("authors", "figures", "tables"):
+            rows = [row for record in records.values() for row in schema.normalize(record)[relation]]
+            pd.DataFrame(rows, columns=schema.columns(relation)).to_excel(
+                excel, sheet_name=relation.capitalize(), index=False)
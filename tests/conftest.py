@@ -0,0 +1,82 @@
+import re
+
+import pytest
+
+from benchmarks.server import read_fixture
+from scrapper import extraction
+from scrapper.checkpoint import Checkpoint
+
+
+def make_record(n=0, title=None, year=2020, captions=("Figure 1.",), tables=("Table 1.",), authors=2,
+                gender="female"):
+    """
+    Returns the details of an article as returned by Journal.get_details.
+
+    :param n: The number of the article, its DOI is 10.1177/n.
+    :param title: The title of the article, "Article n" if not given.
+    :param year: The year the article was published.
+    :param captions: The captions of the figures of the article.
+    :param tables: The captions of the tables of the article.
+    :param authors: The number of authors kept, of the two of every article.
+    :param gender: The gender of the first author, the second one has none.
+    """
+    return {
+        "Paper title": title or f"Article {n}",
+        "Paper DOI": f"https://doi.org/10.1177/{n}",
+        "Publication Date": f"First published March 3, {year}",
+        "Authors": [{"Name": "Jane Doe", "Affiliations": ["Bar-Ilan University", "Tel Aviv University"],
+                     "Gender": gender, "Gender probability": 0.98},
+                    {"Name": "John Roe", "Affiliations": []}][:authors],
+        "Images": [{"Caption": caption, "Link": f"https://example.com/{n}/fig{position}.jpeg"}
+                   for position, caption in enumerate(captions, 1)],
+        "Tables": [{"Caption": caption} for caption in tables],
+    }
+
+
+class FakeJournal:
+    """Serves the fixture pages in place of a browser."""
+
+    def open_link(self, url, kind=None):
+        self.url = url
+
+    def get_articles(self):
+        return extraction.parse_articles(read_fixture("issue.html").decode(), self.url)
+
+    def get_article_snapshot(self):
+        doi = re.search(r"10\.1177/(\d+)", self.url).group(1)
+        return read_fixture("article.html").decode().replace("{{DOI}}", doi), self.url
+
+    def get_session(self, session=None):
+        return session
+
+
+class ListWriter:
+    """Result store keeping the records written to it in a list."""
+
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def record():
+    return make_record
+
+
+@pytest.fixture
+def journal():
+    return FakeJournal()
+
+
+@pytest.fixture
+def writer():
+    return ListWriter()
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.sqlite"))
+    yield checkpoint
+    checkpoint.close()
@@ -0,0 +1,101 @@
+import sqlite3
+
+import pytest
+
+from scrapper.checkpoint import Checkpoint, fingerprint, normalize_doi
+
+ISSUE_URL = "https://journals.sagepub.com/toc/pps/15/3"
+ARTICLE_URL = "https://journals.sagepub.com/doi/full/10.1177/1745691620000001"
+
+
+@pytest.mark.parametrize("value, doi", [
+    ("10.1177/1745691620000001", "10.1177/1745691620000001"),
+    ("https://doi.org/10.1177/1745691620000001/", "10.1177/1745691620000001"),
+    (ARTICLE_URL + "?download=true#section", "10.1177/1745691620000001"),
+    ("https://doi.org/10.1177/ABC.def", "10.1177/abc.def"),
+    ("https://journals.sagepub.com/toc/pps/15/3", None),
+    ("", None),
+    (None, None),
+])
+def test_normalize_doi(value, doi):
+    assert normalize_doi(value) == doi
+
+
+def test_fingerprint():
+    urls = [ARTICLE_URL, "https://doi.org/10.1177/1745691620000002"]
+
+    # The same articles whatever their order and the form of their link
+    assert fingerprint(urls) == fingerprint(["10.1177/1745691620000002", "https://doi.org/10.1177/1745691620000001"])
+    assert fingerprint(urls) != fingerprint(urls[:1])
+    assert fingerprint(None) == fingerprint([])
+
+
+def test_issues(checkpoint):
+    assert not checkpoint.is_issue_done(ISSUE_URL)
+    assert checkpoint.issue_fingerprint(ISSUE_URL) is None
+
+    checkpoint.mark_issue_done(ISSUE_URL, "2020", "abc")
+    assert checkpoint.is_issue_done(ISSUE_URL)
+    assert checkpoint.issue_fingerprint(ISSUE_URL) == "abc"
+
+    checkpoint.reopen_issue(ISSUE_URL)
+    assert not checkpoint.is_issue_done(ISSUE_URL)
+
+
+def test_articles(checkpoint):
+    checkpoint.mark_article_failed(ARTICLE_URL, ISSUE_URL, RuntimeError("timeout"))
+    assert not checkpoint.is_article_done(ARTICLE_URL)
+
+    # Recorded by the DOI of the article, whatever the URL it is found at
+    checkpoint.mark_article_done(ARTICLE_URL, ISSUE_URL, {"Paper DOI": "https://doi.org/10.1177/1745691620000001"})
+    assert checkpoint.is_article_done(ARTICLE_URL)
+    assert checkpoint.is_article_done("https://journals.sagepub.com/doi/10.1177/1745691620000001")
+    assert not checkpoint.is_article_done("https://journals.sagepub.com/doi/10.1177/1745691620000002")
+
+
+def test_checkpoint_survives_reopening(tmp_path):
+    path = str(tmp_path / "checkpoint.sqlite")
+    checkpoint = Checkpoint(path)
+    checkpoint.mark_issue_done(ISSUE_URL, "2020")
+    checkpoint.mark_article_done(ARTICLE_URL, ISSUE_URL, {})
+    checkpoint.close()
+
+    checkpoint = Checkpoint(path)
+    assert checkpoint.is_issue_done(ISSUE_URL)
+    assert checkpoint.is_article_done(ARTICLE_URL)
+    checkpoint.close()
+
+
+def test_checkpoint_without_fingerprints_is_migrated(tmp_path):
+    path = str(tmp_path / "checkpoint.sqlite")
+    # A checkpoint of a run before the fingerprints were recorded
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE issues (url TEXT PRIMARY KEY, year TEXT, finished_at REAL)")
+    connection.execute("INSERT INTO issues VALUES (?, '2020', 0)", (ISSUE_URL,))
+    connection.commit()
+    connection.close()
+
+    checkpoint = Checkpoint(path)
+    assert checkpoint.is_issue_done(ISSUE_URL)
+    assert checkpoint.issue_fingerprint(ISSUE_URL) is None
+    checkpoint.close()
+
+
+def test_article_without_doi(checkpoint):
+    url = "https://journals.sagepub.com/article/1745691620000001"
+    checkpoint.mark_article_done(url, ISSUE_URL, {})
+
+    assert checkpoint.is_article_done(url)
+    assert not checkpoint.is_article_done("https://journals.sagepub.com/article/1745691620000002")
+
+
+@pytest.mark.parametrize("url", [ARTICLE_URL, "https://journals.sagepub.com/article/1745691620000001"])
+def test_article_lookup_uses_an_index(checkpoint, url):
+    # The statement run by the lookup, with its parameters bound
+    statements = []
+    checkpoint.connection.set_trace_callback(statements.append)
+    checkpoint.is_article_done(url)
+    checkpoint.connection.set_trace_callback(None)
+
+    plan = checkpoint.connection.execute(f"EXPLAIN QUERY PLAN {statements[-1]}").fetchall()
+    assert not any(detail.startswith("SCAN") for *_, detail in plan)
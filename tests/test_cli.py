@@ -0,0 +1,46 @@
+import argparse
+
+import pytest
+
+from scrapper.cli import in_shard, parse_shard, select_issues, shard_path
+
+ISSUES = [(str(2000 + n // 4), f"https://journals.sagepub.com/toc/pps/{n // 4}/{n % 4 + 1}") for n in range(40)]
+
+
+@pytest.mark.parametrize("value, shard", [("1/1", (0, 1)), ("1/4", (0, 4)), ("4/4", (3, 4))])
+def test_parse_shard(value, shard):
+    assert parse_shard(value) == shard
+
+
+@pytest.mark.parametrize("value", ["0/4", "5/4", "1/0", "1", "a/b", "-1/4"])
+def test_parse_invalid_shard(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_shard(value)
+
+
+def test_shards_are_disjoint_and_complete():
+    shards = [select_issues(ISSUES, shard=(index, 4)) for index in range(4)]
+
+    assert sorted(issue for shard in shards for issue in shard) == sorted(ISSUES)
+    assert all(shard for shard in shards)
+    # In the order of the issues
+    assert all(shard == [issue for issue in ISSUES if issue in shard] for shard in shards)
+
+
+def test_shard_of_issue_does_not_depend_on_its_url_form():
+    url = ISSUES[0][1]
+
+    assert [in_shard(url, index, 4) for index in range(4)] == [in_shard(url + "/", index, 4) for index in range(4)]
+    assert [in_shard(url, index, 4) for index in range(4)] == \
+        [in_shard(url.replace("https://journals.sagepub.com", "http://localhost:8000"), index, 4) for index in range(4)]
+
+
+def test_select_issues_by_pattern():
+    assert select_issues(ISSUES, pattern=r"/pps/2/") == ISSUES[8:12]
+    assert select_issues(ISSUES) == ISSUES
+    assert select_issues(ISSUES, pattern=r"/pps/2/", shard=(0, 1)) == ISSUES[8:12]
+
+
+def test_shard_path():
+    assert shard_path("data/results.sqlite", (0, 4)) == "data/results.shard-1-of-4.sqlite"
+    assert shard_path("data/results", (3, 4)) == "data/results.shard-4-of-4"
@@ -0,0 +1,22 @@
+from scrapper import crawl, extraction
+from scrapper.gender import GenderLookupError
+
+ISSUE_URL = "https://journals.sagepub.com/toc/pps/15/3"
+
+
+class DownGenders:
+    def enrich(self, records, fetch=True):
+        raise GenderLookupError("genderize is down")
+
+
+def test_articles_without_genders_are_retried(tmp_path, monkeypatch, journal, writer, checkpoint):
+    monkeypatch.setattr(crawl.file_handling, "download_files", lambda links, destination, session, manifest=None: {})
+    monkeypatch.setattr(crawl, "IMAGE_PATH", str(tmp_path / "Photos"))
+    journal.get_details = lambda enrich_gender=True: extraction.parse_details(*journal.get_article_snapshot())
+
+    assert not crawl.scrape_issue(journal, "2020", ISSUE_URL, None, checkpoint, DownGenders(), writer)
+
+    assert writer.records == []
+    assert not checkpoint.is_issue_done(ISSUE_URL)
+    journal.open_link(ISSUE_URL)
+    assert not any(checkpoint.is_article_done(url) for url in journal.get_articles())
@@ -0,0 +1,20 @@
+import threading
+
+from scrapper.database import connect
+
+
+def test_connect_shares_the_database_between_connections(tmp_path):
+    path = str(tmp_path / "shared.sqlite")
+    first, second = connect(path), connect(path)
+    first.execute("CREATE TABLE items (value INTEGER)")
+    first.commit()
+
+    assert first.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    # The second connection waits for the write of the first one instead of failing
+    first.execute("INSERT INTO items VALUES (1)")
+    threading.Timer(0.5, first.commit).start()
+    with second:
+        second.execute("INSERT INTO items VALUES (2)")
+
+    assert sorted(value for value, in second.execute("SELECT value FROM items")) == [1, 2]
@@ -0,0 +1,88 @@
+import pytest
+
+from benchmarks.server import read_fixture
+from scrapper import extraction
+
+ARTICLE_URL = "https://journals.sagepub.com/doi/full/10.1177/1745691620000001"
+ISSUE_URL = "https://journals.sagepub.com/toc/pps/15/3"
+
+
+@pytest.fixture
+def article_html():
+    return read_fixture("article.html").decode().replace("{{DOI}}", "1745691620000001")
+
+
+def affiliations_of(html):
+    return [author["Affiliations"] for author in extraction.parse_details(html, ARTICLE_URL)["Authors"]]
+
+
+def test_affiliations_paired_by_position(article_html):
+    assert affiliations_of(article_html) == [["Bar-Ilan University"], ["Tel Aviv University"],
+                                             ["University of Haifa"], ["Hebrew University of Jerusalem"]]
+
+
+def test_last_author_has_last_affiliation(article_html):
+    # A page listing fewer affiliations than authors
+    html = article_html.replace(
+        '<div property="affiliation" typeof="Organization"><span property="name">University of Haifa</span></div>', "")
+
+    assert affiliations_of(html) == [["Bar-Ilan University"], ["Tel Aviv University"],
+                                     ["Hebrew University of Jerusalem"], ["Hebrew University of Jerusalem"]]
+
+
+@pytest.mark.parametrize("position, authors, affiliations, index", [
+    (0, 1, 2, 0),
+    (1, 2, 3, 2),
+    (1, 3, 1, None),
+    (2, 3, 1, 0),
+    (0, 3, 0, None),
+])
+def test_affiliation_index(position, authors, affiliations, index):
+    assert extraction.affiliation_index(position, authors, affiliations) == index
+
+
+def test_parse_details(article_html):
+    details = extraction.parse_details(article_html, ARTICLE_URL)
+
+    assert details["Paper DOI"] == "https://doi.org/10.1177/1745691620000001"
+    assert details["Paper title"].startswith("Benchmark Article 1745691620000001")
+    assert details["Publication Date"] == "March 3, 2020"
+    assert [author["Name"] for author in details["Authors"]] == ["Jane Doe", "John Roe", "Maria Garcia", "Wei Chen"]
+    # The figures and tables appear twice in the page
+    assert len(details["Images"]) == 5 and len(details["Tables"]) == 3
+    assert details["Images"][0]["Caption"].startswith("Figure 1.")
+    assert details["Images"][0]["Link"].endswith("1745691620000001-fig1.jpeg")
+
+
+def test_parse_details_without_authors(article_html):
+    html = article_html.replace('property="author"', 'property="editor"')
+
+    with pytest.raises(extraction.ExtractionError):
+        extraction.parse_details(html, ARTICLE_URL)
+
+
+def test_parse_articles():
+    articles = extraction.parse_articles(read_fixture("issue.html").decode(), ISSUE_URL)
+
+    assert len(articles) == 13
+    assert articles[1] == ARTICLE_URL
+    assert all(article.startswith("https://journals.sagepub.com/doi/") for article in articles)
+
+
+def test_parse_articles_without_regular_articles():
+    html = read_fixture("issue.html").decode().replace("Regular Articles", "Editorials")
+
+    assert extraction.parse_articles(html, ISSUE_URL) is None
+
+
+def test_parse_issue_index():
+    issues = extraction.parse_issue_index(read_fixture("loi.html").decode(), "https://journals.sagepub.com/loi/pps")
+
+    # The issues of each year in reverse order of the page, including those of the hidden tabs
+    assert issues == [("2020", "https://journals.sagepub.com/toc/pps/15/1"),
+                      ("2020", "https://journals.sagepub.com/toc/pps/15/2"),
+                      ("2020", "https://journals.sagepub.com/toc/pps/15/3"),
+                      ("2018", "https://journals.sagepub.com/toc/pps/13/1"),
+                      ("2018", "https://journals.sagepub.com/toc/pps/13/2"),
+                      ("2015", "https://journals.sagepub.com/toc/pps/10/6")]
+    assert extraction.parse_issue_index("<html><body></body></html>", "https://journals.sagepub.com/loi/pps") == []
@@ -0,0 +1,134 @@
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scrapper import file_handling
+from scrapper.blobstore import BlobStore
+from scrapper.manifest import DownloadManifest
+from scrapper.throttle import RATE_CONTROLLER
+
+CONTENT = bytes(range(256)) * 40
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves CONTENT at any path, honoring Range requests like the journal's CDN."""
+
+    requests = []
+
+    def do_GET(self):
+        RangeHandler.requests.append(self.headers.get("Range"))
+        match = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range") or "")
+        start = int(match.group(1)) if match else 0
+
+        if start >= len(CONTENT):
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{len(CONTENT)}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = CONTENT[start:]
+        self.send_response(206 if match else 200)
+        if match:
+            self.send_header("Content-Range", f"bytes {start}-{len(CONTENT) - 1}/{len(CONTENT)}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        RangeHandler.requests.append("HEAD")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(CONTENT)))
+        self.send_header("ETag", '"fig1"')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    RangeHandler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield "http://{}:{}".format(*httpd.server_address)
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(RATE_CONTROLLER, "enabled", False)
+    session = file_handling.create_session([], "test")
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = DownloadManifest(str(tmp_path / "manifest.sqlite"), blobs=BlobStore(str(tmp_path / "blobs")))
+    yield manifest
+    manifest.close()
+
+
+def test_resumes_partial_download(tmp_path, server, session, manifest):
+    url = server + "/fig1.jpeg"
+    with open(manifest.blobs.temp_path(url), "wb") as f:
+        f.write(CONTENT[:1000])
+
+    file_handling.download_file(url, str(tmp_path), session, manifest)
+
+    assert RangeHandler.requests == ["bytes=1000-"]
+    assert (tmp_path / "fig1.jpeg").read_bytes() == CONTENT
+
+
+@pytest.mark.parametrize("partial", [CONTENT, CONTENT + b"stale"])
+def test_partial_past_the_end_of_the_file(tmp_path, server, session, manifest, partial):
+    url = server + "/fig1.jpeg"
+    with open(manifest.blobs.temp_path(url), "wb") as f:
+        f.write(partial)
+
+    file_handling.download_file(url, str(tmp_path), session, manifest)
+
+    assert (tmp_path / "fig1.jpeg").read_bytes() == CONTENT
+    assert not os.path.exists(manifest.blobs.temp_path(url))
+    assert manifest.get(url)["size"] == len(CONTENT)
+
+
+def test_file_on_disk_is_not_downloaded_again(tmp_path, server, session, manifest):
+    url = server + "/fig1.jpeg"
+    (tmp_path / "fig1.jpeg").write_bytes(CONTENT)
+
+    file_handling.download_file(url, str(tmp_path), session, manifest)
+    file_handling.download_file(url, str(tmp_path), session, manifest, revalidate=False)
+
+    # Only the size of the file is checked
+    assert RangeHandler.requests == ["HEAD"]
+    entry = manifest.get(url)
+    assert entry["etag"] == '"fig1"'
+    assert entry["path"].startswith(manifest.blobs.path)
+    assert os.path.samefile(entry["path"], tmp_path / "fig1.jpeg")
+
+
+def test_truncated_file_on_disk_is_resumed(tmp_path, server, session, manifest):
+    url = server + "/fig1.jpeg"
+    # Left by an interrupted run that wrote to the destination directly
+    (tmp_path / "fig1.jpeg").write_bytes(CONTENT[:100])
+
+    file_handling.download_file(url, str(tmp_path), session, manifest)
+
+    assert RangeHandler.requests == ["HEAD", "bytes=100-"]
+    assert (tmp_path / "fig1.jpeg").read_bytes() == CONTENT
+    assert manifest.get(url)["size"] == len(CONTENT)
+
+
+def test_corrupt_file_on_disk_is_downloaded_again(tmp_path, server, session, manifest):
+    url = server + "/fig1.jpeg"
+    (tmp_path / "fig1.jpeg").write_bytes(CONTENT + b"stale")
+
+    file_handling.download_file(url, str(tmp_path), session, manifest)
+
+    assert (tmp_path / "fig1.jpeg").read_bytes() == CONTENT
@@ -0,0 +1,53 @@
+import pytest
+
+from scrapper.gender import GenderCache, GenderEnricher, GenderLookupError, normalize_name
+
+
+class FlakyGenderize:
+    """Answers the first requests, then fails like genderize past its rate limit."""
+
+    def __init__(self, answered):
+        self.answered = answered
+        self.requests = 0
+
+    def get(self, names):
+        self.requests += 1
+        if self.requests > self.answered:
+            raise RuntimeError("Request limit reached")
+        return [{"name": name, "gender": "female", "probability": 0.9} for name in names]
+
+
+@pytest.fixture
+def enricher(tmp_path):
+    genders = GenderEnricher(cache=GenderCache(str(tmp_path / "genders.sqlite")), batch_size=2)
+    yield genders
+    genders.close()
+
+
+def test_normalize_name():
+    assert normalize_name("Jane A. Doe") == "jane"
+    assert normalize_name("J. Doe") == "j"
+    assert normalize_name("") is None
+
+
+def test_failed_lookup_raises_and_keeps_fetched_batches(enricher):
+    enricher.client = FlakyGenderize(answered=1)
+    record = {"Authors": [{"Name": f"{name} Doe"} for name in ("Ann", "Bea", "Cat", "Dee")]}
+
+    with pytest.raises(GenderLookupError):
+        enricher.enrich([record])
+    assert all("Gender" not in author for author in record["Authors"])
+
+    # The names of the first batch are not requested again
+    enricher.client = FlakyGenderize(answered=1)
+    enricher.enrich([record])
+    assert enricher.client.requests == 1
+    assert [author["Gender"] for author in record["Authors"]] == ["female"] * 4
+
+
+def test_expired_results_used_without_fetching(enricher):
+    enricher.cache.ttl = -1
+    enricher.cache.put_many({"ann": {"gender": "female", "probability": 0.9}})
+
+    assert enricher.lookup(["ann"], fetch=False) == {"ann": {"gender": "female", "probability": 0.9}}
+    assert enricher.cache.get_many(["ann"]) == {}
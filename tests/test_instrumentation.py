@@ -0,0 +1,19 @@
+from contextlib import ExitStack
+
+from scrapper.instrumentation import Recorder
+from scrapper.throttle import RATE_CONTROLLER
+
+
+def test_caller_of_a_throttled_call(monkeypatch):
+    monkeypatch.setattr(RATE_CONTROLLER, "enabled", False)
+    recorder = Recorder(enabled=True)
+
+    def open_link(url):
+        # Like Journal.open_link, the page load is passed to the rate controller as a lambda
+        with ExitStack() as stack:
+            RATE_CONTROLLER.call(url, lambda: stack.enter_context(recorder.timer("get")))
+
+    open_link("https://journals.sagepub.com/toc/pps/15/3")
+
+    assert [name for _, name, _ in recorder.stats] == ["open_link"]
+    assert recorder.report().splitlines()[1].split()[:2] == ["get", "open_link"]
@@ -0,0 +1,49 @@
+import re
+
+from scrapper import crawl, file_handling
+from scrapper.pipeline import Pipeline
+
+ISSUE_URL = "https://journals.sagepub.com/toc/pps/15/3"
+
+
+class FailingGenders:
+    """Fails the gender lookup of the batches holding one article."""
+
+    def __init__(self, doi):
+        self.doi = doi
+
+    def enrich(self, records, fetch=True):
+        if any(record["Paper DOI"].endswith(self.doi) for record in records):
+            raise RuntimeError("genderize is down")
+        return records
+
+
+def test_failures_do_not_abort_the_crawl(tmp_path, monkeypatch, journal, writer, checkpoint):
+    journal.open_link(ISSUE_URL)
+    urls = journal.get_articles()
+
+    monkeypatch.setattr(crawl, "IMAGE_PATH", str(tmp_path / "Photos"))
+    monkeypatch.setattr(file_handling, "download_files", lambda links, destination, session, manifest=None: {})
+
+    # The directory of one article cannot be created
+    article_dir = crawl.article_dir
+    bad_doi = re.search(r"10\.1177/\d+", urls[1]).group(0)
+
+    def failing_article_dir(details, year):
+        if details["Paper DOI"].endswith(bad_doi):
+            raise OSError("invalid directory name")
+        return article_dir(details, year)
+
+    monkeypatch.setattr(crawl, "article_dir", failing_article_dir)
+
+    genders = FailingGenders(re.search(r"10\.1177/\d+", urls[-1]).group(0))
+
+    Pipeline([journal], None, checkpoint, genders, writer, concurrency={"extraction": 1}).run(
+        [("2020", ISSUE_URL)])
+
+    written = {record["Paper DOI"] for record in writer.records}
+    assert written and len(written) < len(urls)
+    assert not any(doi.endswith(bad_doi) for doi in written)
+    assert all(checkpoint.is_article_done(url) == any(doi.endswith(url[-10:]) for doi in written) for url in urls)
+    # The issue is retried on the next run
+    assert not checkpoint.is_issue_done(ISSUE_URL)
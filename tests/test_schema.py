@@ -0,0 +1,67 @@
+from scrapper import schema
+
+
+def assemble(rows):
+    return list(schema.assemble(rows["articles"], rows["authors"], rows["figures"], rows["tables"]))
+
+
+def test_normalize(record):
+    rows = schema.normalize(record(1, "Eye tracking in reading", tables=("Table 1.", "Table 2.")))
+
+    assert rows["articles"] == [{"doi": "10.1177/1", "doi_link": "https://doi.org/10.1177/1",
+                                 "title": "Eye tracking in reading",
+                                 "publication_date": "First published March 3, 2020",
+                                 "authors": 2, "images": 1, "tables": 2}]
+    assert [(row["position"], row["affiliations"], row["gender"]) for row in rows["authors"]] == \
+        [(1, "Bar-Ilan University; Tel Aviv University", "female"), (2, None, None)]
+    assert [row["position"] for row in rows["tables"]] == [1, 2]
+    assert all(set(row) == set(schema.columns(relation)) for relation in rows for row in rows[relation])
+
+
+def test_normalize_assemble_round_trip(record):
+    assert assemble(schema.normalize(record())) == [record()]
+
+
+def test_article_without_doi_is_keyed_by_title(record):
+    details = dict(record(), **{"Paper DOI": None})
+
+    assert schema.article_key(details) == "Article 0"
+    assert assemble(schema.normalize(details)) == [details]
+
+
+def test_assemble_keeps_latest_write(record):
+    first, second = schema.normalize(record(authors=2)), schema.normalize(record(title="Revised", authors=1))
+    rows = {relation: first[relation] + second[relation] for relation in schema.RELATIONS}
+
+    # The rows of the second author belong to the first version of the article
+    assert assemble(rows) == [record(title="Revised", authors=1)]
+
+
+def test_from_wide(record):
+    wide = {
+        "Paper title": "Eye tracking in reading",
+        "Paper DOI": "https://doi.org/10.1177/1745691620000001",
+        "Publication Date": "March 3, 2020",
+        "Name of the first author": "Jane Doe",
+        "Affiliation of the first author": "Bar-Ilan University",
+        "Gender of the first author": "female",
+        "First author gender probability": 0.98,
+        "Name of the last author": "John Roe",
+        "Affiliation of the last author": None,
+        "Image 2 caption": "Figure 2.", "Image 2 Link": "https://example.com/fig2.jpeg",
+        "Image 10 caption": "Figure 10.", "Image 10 Link": "https://example.com/fig10.jpeg",
+        "Table 1 caption": "Table 1.",
+    }
+
+    assert schema.from_wide(wide) == {
+        "Paper title": "Eye tracking in reading",
+        "Paper DOI": "https://doi.org/10.1177/1745691620000001",
+        "Publication Date": "March 3, 2020",
+        "Authors": [{"Name": "Jane Doe", "Affiliations": ["Bar-Ilan University"], "Gender": "female",
+                     "Gender probability": 0.98},
+                    {"Name": "John Roe", "Affiliations": []}],
+        "Images": [{"Caption": "Figure 2.", "Link": "https://example.com/fig2.jpeg"},
+                   {"Caption": "Figure 10.", "Link": "https://example.com/fig10.jpeg"}],
+        "Tables": [{"Caption": "Table 1."}],
+    }
+    assert schema.from_wide(record()) == record()
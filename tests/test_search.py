@@ -0,0 +1,53 @@
+import pytest
+
+from scrapper.cli import main
+from scrapper.search import SearchIndex, publication_year
+
+
+@pytest.fixture
+def index(tmp_path, record):
+    search_index = SearchIndex(str(tmp_path / "search.sqlite"))
+    search_index.add_many([
+        record(1, "Eye tracking in reading", captions=["Eye tracking setup", "Eye tracking results"]),
+        record(2, "Memory and attention", 2015, ["Eye tracking of attention"], gender="male"),
+        record(3, "Cognition", captions=[]),
+    ])
+    yield search_index
+    search_index.close()
+
+
+def test_publication_year():
+    assert publication_year("First published March 3, 2020") == 2020
+    assert publication_year(None) is None
+
+
+def test_search_finds_each_article_once(index):
+    results = index.search("eye tracking")
+
+    assert sorted(result["doi"] for result in results) == ["10.1177/1", "10.1177/2"]
+    assert all(result["snippet"] for result in results)
+    assert len(index.search("eye tracking", limit=1)) == 1
+
+
+def test_search_filters(index):
+    assert [result["doi"] for result in index.search("tracking", year=2015)] == ["10.1177/2"]
+    assert [result["doi"] for result in index.search(gender="female", author_position="first")] == \
+        ["10.1177/3", "10.1177/1"]
+    assert [result["doi"] for result in index.search(author="roe", year=(2016, 2030))] == ["10.1177/3", "10.1177/1"]
+    assert index.search("cognition", affiliation="Hebrew University") == []
+
+
+def test_search_invalid_query_matches_words(index):
+    assert [result["doi"] for result in index.search("reading:")] == ["10.1177/1"]
+
+
+def test_add_replaces_article(index, record):
+    index.add(record(3, "Perception", captions=[]))
+
+    assert index.search("cognition") == []
+    assert [result["doi"] for result in index.search("perception")] == ["10.1177/3"]
+
+
+def test_author_position_requires_gender(tmp_path):
+    with pytest.raises(SystemExit):
+        main(["search", "--author-position", "first", "--index", str(tmp_path / "search.sqlite")])
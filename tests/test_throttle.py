@@ -0,0 +1,36 @@
+import pytest
+
+import scrapper.constants as const
+from scrapper.throttle import retry_after, throttled_response
+
+
+class Response:
+    def __init__(self, status_code=200, retry_after=None):
+        self.status_code = status_code
+        self.headers = {"Retry-After": retry_after} if retry_after is not None else {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize("value, delay", [
+    ("5", 5.0),
+    ("-3", 0.0),
+    ("99999", const.RATE_BACKOFF_MAX),
+    ("Wed, 21 Oct 2099 07:28:00 GMT", const.RATE_BACKOFF_MAX),
+    ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0),
+    ("soon", None),
+    (None, None),
+])
+def test_retry_after(value, delay):
+    assert retry_after(Response(429, value)) == delay
+
+
+def test_throttled_response():
+    assert throttled_response(Response(200)) is False
+    assert throttled_response(Response(503)) is True
+
+    response = Response(429, "7")
+    assert throttled_response(response) == 7.0
+    assert response.closed
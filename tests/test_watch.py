@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from benchmarks.server import read_fixture
+from scrapper import extraction, watch
+from scrapper.checkpoint import fingerprint
+
+ISSUE_URL = "https://journals.sagepub.com/toc/pps/15/3"
+
+
+class FakeFetcher:
+    """Serves the issue fixture in place of the site, except for the unavailable issues."""
+
+    def __init__(self, unavailable=()):
+        self.unavailable = unavailable
+        self.fetched = []
+
+    def fetch(self, url):
+        self.fetched.append(url)
+        if url in self.unavailable:
+            return None
+
+        return read_fixture("issue.html").decode()
+
+
+@pytest.fixture
+def articles():
+    return extraction.parse_articles(read_fixture("issue.html").decode(), ISSUE_URL)
+
+
+def test_unchanged_issue_is_skipped(checkpoint, articles):
+    checkpoint.mark_issue_done(ISSUE_URL, "2020", fingerprint(articles))
+
+    assert watch.changed_issues(FakeFetcher(), [("2020", ISSUE_URL)], checkpoint) == ([], [])
+    assert checkpoint.is_issue_done(ISSUE_URL)
+
+
+def test_issue_with_new_articles_is_reopened(checkpoint, articles):
+    checkpoint.mark_issue_done(ISSUE_URL, "2020", fingerprint(articles[:-1]))
+    for article in articles[:-1]:
+        checkpoint.mark_article_done(article, ISSUE_URL, {})
+
+    assert watch.changed_issues(FakeFetcher(), [("2020", ISSUE_URL)], checkpoint) == ([("2020", ISSUE_URL)], [])
+    assert not checkpoint.is_issue_done(ISSUE_URL)
+
+
+def test_issue_with_scraped_articles_gets_its_fingerprint(checkpoint, articles):
+    # Finished by a run that did not record the fingerprints
+    checkpoint.mark_issue_done(ISSUE_URL, "2020")
+    for article in articles:
+        checkpoint.mark_article_done(article, ISSUE_URL, {})
+
+    assert watch.changed_issues(FakeFetcher(), [("2020", ISSUE_URL)], checkpoint) == ([], [])
+    assert checkpoint.issue_fingerprint(ISSUE_URL) == fingerprint(articles)
+
+
+def test_unfinished_and_unavailable_issues(checkpoint):
+    other_url = "https://journals.sagepub.com/toc/pps/15/2"
+    checkpoint.mark_issue_done(ISSUE_URL, "2020", "abc")
+    fetcher = FakeFetcher(unavailable=[ISSUE_URL])
+
+    # An unfinished issue is scraped without being fetched, an unavailable one is left to the browser
+    assert watch.changed_issues(fetcher, [("2020", ISSUE_URL), ("2020", other_url)], checkpoint) == \
+        ([("2020", other_url)], [("2020", ISSUE_URL)])
+    assert fetcher.fetched == [ISSUE_URL]
+    assert checkpoint.is_issue_done(ISSUE_URL)
+
+
+def test_watched_issues(checkpoint, monkeypatch):
+    year = time.localtime().tm_year
+    issues = [(str(year), "https://journals.sagepub.com/toc/pps/20/1"),
+              (str(year - 5), "https://journals.sagepub.com/toc/pps/15/1"),
+              (str(year - 5), "https://journals.sagepub.com/toc/pps/15/2")]
+    checkpoint.mark_issue_done(issues[0][1], issues[0][0])
+    checkpoint.mark_issue_done(issues[1][1], issues[1][0])
+    monkeypatch.setattr("scrapper.constants.WATCH_ISSUES", ["https://journals.sagepub.com/toc/pps/0/0"])
+
+    # The finished issues of the recent years, the unfinished ones and the issues listed apart
+    assert watch.watched_issues(issues, checkpoint, recent_years=2) == \
+        [issues[0], issues[2], ("Online First", "https://journals.sagepub.com/toc/pps/0/0")]
+    assert watch.watched_issues(issues, checkpoint, last_year=year - 1, recent_years=2)[:1] == [issues[2]]
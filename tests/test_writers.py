@@ -0,0 +1,117 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from scrapper.writers import (WRITERS, ParquetWriter, ResultWriter, SQLiteWriter, detect_backend, export_excel,
+                              open_writer)
+
+
+# Path of the store of each backend, in a temporary directory
+STORE_NAMES = {"csv": "results", "jsonl": "results.jsonl", "sqlite": "results.sqlite", "parquet": "results.parquet"}
+
+
+@pytest.fixture(params=list(WRITERS))
+def store_path(request, tmp_path):
+    if request.param == "parquet":
+        pytest.importorskip("pyarrow")
+
+    return request.param, str(tmp_path / STORE_NAMES[request.param])
+
+
+def test_round_trip(store_path, record):
+    backend, path = store_path
+    with open_writer(backend, path) as writer:
+        writer.write(record(0))
+        writer.write_many([record(1), record(2)])
+
+    # Reopening a store appends to it
+    with open_writer(backend, path) as writer:
+        writer.write(record(3))
+        assert detect_backend(path) == backend
+        assert list(writer.read()) == [record(n) for n in range(4)]
+
+
+def test_article_written_again(store_path, record):
+    backend, path = store_path
+    updated = dict(record(0), **{"Paper title": "Article 0, revised", "Tables": []})
+    with open_writer(backend, path) as writer:
+        writer.write_many([record(0), record(1), updated])
+
+        # The JSON Lines backend keeps every write, the others the latest one
+        expected = [record(0), record(1), updated] if backend == "jsonl" else [record(1), updated]
+        assert list(writer.read()) == expected
+
+
+def test_empty_store(store_path):
+    backend, path = store_path
+    with open_writer(backend, path) as writer:
+        assert list(writer.read()) == []
+
+
+def test_unknown_backend(tmp_path):
+    with pytest.raises(ValueError):
+        open_writer("xml", str(tmp_path / "results.xml"))
+    with pytest.raises(ValueError):
+        detect_backend(str(tmp_path / "results.xml"))
+
+
+def test_sqlite_store_of_the_wide_output_is_migrated(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    wide = {"Paper title": "Article 0", "Paper DOI": "https://doi.org/10.1177/0",
+            "Publication Date": "First published March 3, 2020", "Name of the first author": "Jane Doe",
+            "Affiliation of the first author": "Bar-Ilan University", "Table 1 caption": "Table 1."}
+    # A store written before the relational output, one JSON record per article
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE records (doi TEXT PRIMARY KEY, record TEXT, written_at REAL)")
+    connection.execute("INSERT INTO records VALUES (?, ?, 0)", ("10.1177/0", json.dumps(wide)))
+    connection.commit()
+    connection.close()
+
+    with SQLiteWriter(path) as writer:
+        assert list(writer.read()) == [{"Paper title": "Article 0", "Paper DOI": "https://doi.org/10.1177/0",
+                                        "Publication Date": "First published March 3, 2020",
+                                        "Authors": [{"Name": "Jane Doe", "Affiliations": ["Bar-Ilan University"]}],
+                                        "Images": [], "Tables": [{"Caption": "Table 1."}]}]
+        assert writer.connection.execute("SELECT name FROM sqlite_master WHERE name = 'records'").fetchone() is None
+
+
+def test_parquet_export_before_close(tmp_path, record):
+    pytest.importorskip("pyarrow")
+
+    writer = ParquetWriter(str(tmp_path / "results.parquet"), row_group_size=2)
+    for n in range(3):
+        writer.write(record(n))
+
+    # The crawl exports the store before closing it
+    export_excel(writer, str(tmp_path / "output.xlsx"))
+    writer.write(record(3))
+    writer.close()
+
+    articles = pd.read_excel(tmp_path / "output.xlsx", sheet_name="Articles")
+    assert list(articles["Paper title"]) == ["Article 0", "Article 1", "Article 2"]
+
+    with ParquetWriter(str(tmp_path / "results.parquet")) as reader:
+        assert [details["Paper title"] for details in reader.read()] == [f"Article {n}" for n in range(4)]
+
+
+def test_result_writer_is_abstract():
+    with pytest.raises(TypeError):
+        ResultWriter("results")
+
+
+def test_parquet_writer_left_open_is_flushed_at_exit(tmp_path, record):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "results.parquet")
+
+    # A crawl stopping on an exception without closing its writer
+    code = ("import sys; from scrapper.writers import ParquetWriter; "
+            f"writer = ParquetWriter({path!r}); writer.write({record(0)!r}); sys.exit(1)")
+    subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    with ParquetWriter(path) as reader:
+        assert [details["Paper title"] for details in reader.read()] == ["Article 0"]